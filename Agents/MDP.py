@@ -0,0 +1,154 @@
+import numpy as np
+
+"""A finite Markov decision process whose transition model is held in sparse arrays. Transition k
+leads from state rows[k] // numActions under action rows[k] % numActions to nextStates[k] with
+probability probabilities[k]; rows is sorted, so the transitions of each (state, action) pair are
+contiguous. Only transitions that continue the episode are kept, since a terminal transition
+contributes its reward and nothing after it. Bellman backups over all states are then a gather and
+a np.bincount, costing time proportional to the number of transitions rather than states squared.
+"""
+class MDP:
+    def __init__(self, numStates, numActions, rows, nextStates, probabilities, expectedRewards):
+        self.numStates = numStates
+        self.numActions = numActions
+        self.rows = rows
+        self.nextStates = nextStates
+        self.probabilities = probabilities
+        # the reward expected from each (state, action) pair, shape (numStates, numActions)
+        self.expectedRewards = expectedRewards
+        # the transitions of state s are rows[stateStarts[s]:stateStarts[s + 1]]
+        self.stateStarts = np.searchsorted(rows, np.arange(numStates + 1) * numActions)
+        self.predecessorIndex = None
+
+    @staticmethod
+    def fromTransitions(transitions, numActions):
+        """Builds the arrays from gym's format, where transitions[state][action] is a list of
+        (probability, next state, reward, done) tuples, as in the toy_text environments' P"""
+        numStates = len(transitions)
+        rows, nextStates, probabilities = [], [], []
+        expectedRewards = np.zeros((numStates, numActions))
+        for state in range(numStates):
+            for action, outcomes in transitions[state].items() if isinstance(transitions[state], dict) \
+                    else enumerate(transitions[state]):
+                for probability, nextState, reward, done in outcomes:
+                    expectedRewards[state, action] += probability * reward
+                    if not done and probability > 0:
+                        rows.append(state * numActions + action)
+                        nextStates.append(nextState)
+                        probabilities.append(probability)
+        # outcomes of a pair that land in the same state (such as slipping into a wall) are merged
+        pairs, inverse = np.unique(np.array(rows, dtype=np.intp) * numStates + np.array(nextStates, dtype=np.intp),
+                                   return_inverse=True)
+        merged = np.bincount(inverse.ravel(), probabilities, minlength=len(pairs))
+        return MDP(numStates, numActions, pairs // numStates, pairs % numStates, merged, expectedRewards)
+
+    def qValues(self, values, gamma):
+        """One Bellman backup of every (state, action) pair from the given state values"""
+        future = np.bincount(self.rows, self.probabilities * values[self.nextStates],
+                             minlength=self.numStates * self.numActions)
+        return self.expectedRewards + gamma * future.reshape(self.numStates, self.numActions)
+
+    def stateQValues(self, state, values, gamma):
+        """One Bellman backup of the actions of a single state"""
+        start, end = self.stateStarts[state], self.stateStarts[state + 1]
+        future = np.bincount(self.rows[start:end] - state * self.numActions,
+                             self.probabilities[start:end] * values[self.nextStates[start:end]],
+                             minlength=self.numActions)
+        return self.expectedRewards[state] + gamma * future
+
+    def predecessors(self, state):
+        """Returns the (state * numActions + action) rows that can lead to the given state and their probabilities"""
+        if self.predecessorIndex is None:
+            order = np.argsort(self.nextStates, kind='stable')
+            starts = np.searchsorted(self.nextStates[order], np.arange(self.numStates + 1))
+            self.predecessorIndex = (self.rows[order], self.probabilities[order], starts)
+        rows, probabilities, starts = self.predecessorIndex
+        return rows[starts[state]:starts[state + 1]], probabilities[starts[state]:starts[state + 1]]
+
+    def policyModel(self, policy):
+        """Returns the transitions the given deterministic policy follows, as (states, next states,
+        probabilities), and the reward it expects in each state"""
+        states = self.rows // self.numActions
+        taken = self.rows % self.numActions == policy[states]
+        return (states[taken], self.nextStates[taken], self.probabilities[taken],
+                self.expectedRewards[np.arange(self.numStates), policy])
+
+    def policyMatrix(self, policy):
+        """The dense numStates x numStates transition matrix of a deterministic policy and its expected rewards"""
+        states, nextStates, probabilities, rewards = self.policyModel(policy)
+        matrix = np.zeros((self.numStates, self.numStates))
+        np.add.at(matrix, (states, nextStates), probabilities)
+        return matrix, rewards
+
+
+class LearnedModel:
+    """An estimate of an MDP built from observed transitions. States are numbered as they are first
+    seen, and every distinct (state, action, next state, done) outcome gets a slot in growable arrays
+    holding how often it happened and the rewards it gave. Probabilities and mean rewards follow
+    from the counts, so observing a transition is O(1)."""
+    def __init__(self, numActions, capacity=1024):
+        self.numActions = numActions
+        self.stateIds = {}
+        self.states = []
+        self.outcomeIds = {}
+        self.size = 0
+        self.rows = np.zeros(capacity, dtype=np.intp)
+        self.nextStates = np.zeros(capacity, dtype=np.intp)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.counts = np.zeros(capacity)
+        self.rewardSums = np.zeros(capacity)
+        self.cumulativeCounts = None
+
+    def stateId(self, state):
+        stateId = self.stateIds.get(state)
+        if stateId is None:
+            stateId = self.stateIds[state] = len(self.states)
+            self.states.append(state)
+        return stateId
+
+    def observe(self, state, action, reward, nextState, done):
+        row = self.stateId(state) * self.numActions + action
+        key = (row, self.stateId(nextState), bool(done))
+        ind = self.outcomeIds.get(key)
+        if ind is None:
+            if self.size == len(self.rows):
+                self.grow()
+            ind = self.outcomeIds[key] = self.size
+            self.rows[ind], self.nextStates[ind], self.dones[ind] = key
+            self.size += 1
+        self.counts[ind] += 1
+        self.rewardSums[ind] += reward
+        self.cumulativeCounts = None
+
+    def grow(self):
+        for name in ('rows', 'nextStates', 'dones', 'counts', 'rewardSums'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+
+    def sample(self, number):
+        """Draws outcomes in proportion to how often they were observed, returning the indices of their slots"""
+        if self.cumulativeCounts is None:
+            self.cumulativeCounts = np.cumsum(self.counts[:self.size])
+        draws = np.random.uniform(0, self.cumulativeCounts[-1], number)
+        return np.minimum(np.searchsorted(self.cumulativeCounts, draws, side='right'), self.size - 1)
+
+    def meanRewards(self, inds):
+        return self.rewardSums[inds] / self.counts[inds]
+
+    def toMDP(self):
+        """The maximum likelihood MDP over the states seen so far; unvisited pairs have no transitions and no reward"""
+        numStates = len(self.states)
+        size = self.size
+        rows, counts = self.rows[:size], self.counts[:size]
+        pairCounts = np.bincount(rows, counts, minlength=numStates * self.numActions)
+        expectedRewards = np.bincount(rows, self.rewardSums[:size], minlength=numStates * self.numActions)
+        visited = pairCounts > 0
+        expectedRewards[visited] /= pairCounts[visited]
+        keep = ~self.dones[:size]
+        pairs, inverse = np.unique(rows[keep] * numStates + self.nextStates[:size][keep], return_inverse=True)
+        probabilities = np.bincount(inverse.ravel(), counts[keep], minlength=len(pairs))
+        return MDP(numStates, self.numActions, pairs // numStates, pairs % numStates,
+                   probabilities / pairCounts[pairs // numStates], expectedRewards.reshape(numStates, self.numActions))
+
+    def clear(self):
+        self.__init__(self.numActions)
@@ -2,8 +2,6 @@ from Agents import modelFreeAgent
 import numpy as np
 from collections import deque
 import random
-import joblib
-import cffi
 import os
 import pathlib
 import platform
@@ -34,6 +32,7 @@ class ActorCriticNative(modelFreeAgent.ModelFreeAgent):
         curDir = oldwd / "Agents/Native/actorCriticNative"
         os.chdir(curDir.as_posix())
 
+        import cffi
         self.ffi = cffi.FFI()
         if platform.system() == "Windows":
             if not importlib.util.find_spec("Agents.Native.actorCriticNative.Release._actorCriticNative"):
@@ -1,6 +1,5 @@
 from Agents import drqn
 import numpy as np
-import itertools
 
 class ADRQN(drqn.DRQN):
     displayName = 'ADRQN'
@@ -8,6 +7,9 @@ class ADRQN(drqn.DRQN):
     def __init__(self, *args):
         super().__init__(*args)
         self.memory = ADRQN.ReplayBuffer(self, self.memory_size, self.historylength)
+        self.batchPrevActions = np.zeros((self.batch_size, self.historylength, self.action_size))
+        self.batchNextActions = np.zeros((self.batch_size, self.historylength, self.action_size))
+        self.recentActions = np.zeros((self.historylength, self.action_size))
 
     def getRecentAction(self):
         return self.memory.get_recent_action()
@@ -15,24 +17,17 @@ class ADRQN(drqn.DRQN):
     def choose_action(self, state):
         recent_state = self.getRecentState()
         recent_state = np.concatenate([recent_state[1:], [state]], 0)
-        recentRawActions = self.getRecentAction()
-        recent_action = [self.create_one_hot(self.action_size, action) for action in recentRawActions]
+        recent_action = self.oneHot(self.getRecentAction(), self.recentActions)
         qval = self.predict((recent_state, recent_action), False)
         action = np.argmax(qval)
         return action
 
     def predict(self, state, isTarget):
-        state, action = state
-        stateShape = (1,) + (self.historylength,) + self.state_size
-        actionShape = (1,) + (self.historylength,) + (self.action_size,)
-        state = np.reshape(state, stateShape)
-        action = np.reshape(action, actionShape)
-
-        if isTarget:
-            result = self.target.predict([state, action, self.allMask])
-        else:
-            result = self.model.predict([state, action, self.allMask])
-        return result
+        return self.predictOne(state, isTarget)
+
+    def policyLayers(self):
+        # the state and action branches are joined, which the layer list cannot describe
+        return None
 
     def buildQNetwork(self):
         from tensorflow.python.keras.optimizer_v2.adam import Adam
@@ -71,84 +66,31 @@ class ADRQN(drqn.DRQN):
         return model
 
     def calculateTargetValues(self, mini_batch):
-        X_train = [np.zeros((self.batch_size,) + (self.historylength,) + self.state_size),
-                   np.zeros((self.batch_size,) + (self.historylength,) + (self.action_size,)),
-                   np.zeros((self.batch_size,) + (self.action_size,))]
-        next_states = [np.zeros((self.batch_size,) + (self.historylength,) + self.state_size),
-                   np.zeros((self.batch_size,) + (self.historylength,) + (self.action_size,))]
-
-        for index_rep, history in enumerate(mini_batch):
-            for histInd, (prevAction, state, action, reward, next_state, isDone) in enumerate(history):
-                X_train[0][index_rep][histInd] = state
-                next_states[0][index_rep][histInd] = next_state
-                X_train[1][index_rep][histInd] = self.create_one_hot(self.action_size, prevAction)
-                next_states[1][index_rep][histInd] = self.create_one_hot(self.action_size, action)
-            X_train[2][index_rep] = self.create_one_hot(self.action_size, action)
-
-        Y_train = np.zeros((self.batch_size,) + (self.action_size,))
-        qnext = self.target.predict(next_states + [self.allBatchMask])
-        qnext = np.amax(qnext, 1)
+        prevActions, states, actions, rewards, next_states, dones = mini_batch
+        X_train = [states, self.oneHot(prevActions, self.batchPrevActions), self.oneHot(actions[:, -1], self.batchActionMask)]
+        next_inputs = [next_states, self.oneHot(actions, self.batchNextActions)]
 
-        for index_rep, history in enumerate(mini_batch):
-            prevAction, state, action, reward, next_state, isDone = history[-1]
-            if isDone:
-                Y_train[index_rep][action] = reward
-            else:
-                Y_train[index_rep][action] = reward + qnext[index_rep] * self.gamma
-        return X_train, Y_train
+        qnext = self.target.predict_on_batch(next_inputs + [self.allBatchMask])
+        qnext = np.amax(qnext, 1)
+        return X_train, self.fillTargets(actions[:, -1], rewards[:, -1], dones[:, -1], qnext)
 
 
     class ReplayBuffer(drqn.DRQN.ReplayBuffer):
-        def __init__(self, *args):
-            super().__init__(*args)
-
-            shape = self.learner.state_size
-            if len(shape) >= 2:
-                self.emptyState = np.array([[[-10000]] * shape[0] for _ in range(shape[1])])
-            else:
-                self.emptyState = np.array([-10000] * shape[0])
-            self.emptyTrans = (self.emptyState, -1, 0, self.emptyState, False)
-
-        def getTransitions(self, startInd):
-            result = []
+        """Also returns the action taken before each frame of a history, -1 at the first frame of an episode"""
+        def allocateBatch(self, batch_size):
+            super().allocateBatch(batch_size)
+            self.batchPrevActions = np.zeros((batch_size, self.historylength), dtype=np.int64)
+
+        def gather(self, slots):
+            size = min(self.maxlength, self.curIndex)
             limit = (self.curIndex-1)%self.maxlength
-            for ind in range(startInd, startInd+self.historylength):
-                ind %= self.maxlength
-                transition = self.transitions[ind]
-                if transition is None:
-                    break
-                prevInd = (ind-1)%self.maxlength
-                prevTransition = self.transitions[prevInd]
-                prevAction = -1
-                if prevTransition and not prevInd == limit and not prevTransition[4]:
-                    prevAction = prevTransition[1]
-                result.append((prevAction,) + transition)
-                if transition[4] or ind == limit:
-                    break
-            return self.pad(result)
-
-        def pad(self, transitions):
-            pad = [(-1, self.emptyState, -1, 0, self.emptyState, False) for _ in
-                   range(self.historylength - len(transitions))]
-            return pad + transitions
+            prevSlots = (slots-1)%self.maxlength
+            known = (slots >= 0) & (prevSlots < size) & (prevSlots != limit) & ~self.dones[prevSlots]
+            batch = super().gather(slots)
+            np.take(self.actions, prevSlots, out=self.batchPrevActions)
+            self.batchPrevActions[~known] = -1
+            return (self.batchPrevActions,) + batch
 
         def get_recent_action(self):
-            result = [None] * self.historylength
-            resInd = self.historylength - 1
-            start = (self.curIndex - 1) % self.maxlength
-            transition = self.transitions[start]
-            result[resInd] = transition[1]
-            resInd -= 1
-            for ind in range(start - 1, start - self.historylength, -1):
-                ind %= self.maxlength
-                transition = self.transitions[ind]
-                if not transition or transition[4]:
-                    break
-                result[resInd] = transition[1]
-                resInd -= 1
-
-            while resInd >= 0:
-                result[resInd] = -1
-                resInd -= 1
-
-            return result
\ No newline at end of file
+            slots = self.recentSlots()
+            return np.where(slots >= 0, self.actions[np.maximum(slots, 0)], -1)
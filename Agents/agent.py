@@ -20,6 +20,10 @@ class Agent(ABC):
 
     parameters = [Parameter('Gamma', 0.00, 1.00, 0.001, 0.97, True, True, "The factor by which to discount future rewards")]
 
+    # Whether the agent can be trained on several environment copies at once. Agents that
+    # keep per-episode history between calls (recurrent and native agents) must leave this off.
+    supportsVectorEnv = False
+
     def __init__(self, state_size, action_size, gamma):
         """The constructor method
         :param state_size: the shape of the environment state
@@ -44,6 +48,64 @@ class Agent(ABC):
         """
         self.time_steps += 1
 
+    def choose_actions(self, states):
+        """Returns the actions chosen by the agent's current policy for a batch of states
+        :param states: the current states of several environment copies
+        :type states: list
+        :return: the action chosen for each state
+        :rtype: list
+        """
+        return [self.choose_action(state) for state in states]
+
+    def setStateBins(self, stateBins):
+        """Called by the Model when the environment's states are tuples of small non-negative integers,
+        so that agents that tabulate states can preallocate their storage
+        :param stateBins: the number of values each component of the state can take
+        :type stateBins: tuple
+        :return: None
+        :rtype: None
+        """
+        pass
+
+    def setStateBounds(self, stateBounds):
+        """Called by the Model when the environment knows the range of each state component, so that
+        agents can scale states
+        :param stateBounds: the lowest and highest values of each state component
+        :type stateBounds: tuple
+        :return: None
+        :rtype: None
+        """
+        pass
+
+    def setTransitions(self, transitions):
+        """Called by the Model with the environment's full transition model when it exposes one,
+        so that model-based agents can plan with it
+        :param transitions: transitions[state][action] is a list of (probability, next state, reward, done)
+        tuples, with states numbered in the row-major order of the environment's stateBins
+        :type transitions: list or dict
+        :return: None
+        :rtype: None
+        """
+        pass
+
+    def finishTraining(self):
+        """Called by the Model when a training run ends, so that agents that learn in the background
+        can finish and bring the policy they act with up to date
+        :return: None
+        :rtype: None
+        """
+        pass
+
+    def exportPolicy(self, filename):
+        """Saves the agent's greedy policy in a form Agents.numpyPolicy can evaluate without the
+        libraries the agent was trained with
+        :param filename: the name of the .npz file to write
+        :type filename: str
+        :return: None
+        :rtype: None
+        """
+        print(self.displayName + ' cannot be exported as a NumPy policy')
+
     @abstractmethod
     def save(self, filename):
         """Saves the agent's Q-function to a given file location
@@ -0,0 +1,91 @@
+import threading
+import traceback
+
+"""Runs a deep Q agent's gradient updates in a background thread, so that acting does not wait for
+learning. The agent's remember only stores transitions and reports how many environment steps it
+took; the learner thread calls the agent's learn() until it has made updatesPerStep updates per
+reported step, then waits for more. TensorFlow releases the interpreter lock while it computes,
+so on a multi-core machine acting and learning overlap. Acting waits whenever the learner falls
+more than maxBacklog updates behind, so the updates owed when learning stops stay few.
+
+The agent acts with its own copy of the network, which the learner refreshes at least every
+maxStaleness updates and whenever learning stops, and the learner keeps the target network in step
+every target_update_interval updates.
+"""
+class AsyncLearner:
+    # how many times maxStaleness updates the learner may owe before acting waits for it
+    BACKLOG_FACTOR = 4
+
+    def __init__(self, agent, updatesPerStep, maxStaleness):
+        self.agent = agent
+        self.updatesPerStep = updatesPerStep
+        self.maxStaleness = max(1, int(maxStaleness))
+        self.maxBacklog = AsyncLearner.BACKLOG_FACTOR * self.maxStaleness
+        self.condition = threading.Condition()
+        self.steps = 0
+        self.updates = 0
+        self.published = 0
+        self.stopping = False
+        # raised to the acting thread if an update fails
+        self.error = None
+        # the loss of the latest update, which remember reports
+        self.loss = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def owed(self):
+        return self.updatesPerStep * self.steps - self.updates
+
+    def due(self):
+        return self.owed() > 0
+
+    def addSteps(self, count):
+        """Reports count environment steps whose transitions are in memory, returning the latest loss.
+        Waits while the learner owes more than maxBacklog updates."""
+        with self.condition:
+            self.raiseError()
+            self.steps += count
+            self.condition.notify_all()
+            while self.owed() > self.maxBacklog and self.error is None:
+                self.condition.wait()
+            self.raiseError()
+        return self.loss
+
+    def raiseError(self):
+        if self.error is not None:
+            raise RuntimeError('the learner thread failed') from self.error
+
+    def run(self):
+        agent = self.agent
+        try:
+            while True:
+                with self.condition:
+                    while not self.due() and not self.stopping:
+                        self.condition.wait()
+                    # stopping finishes the updates already owed
+                    if not self.due():
+                        break
+                loss = agent.learn()
+                with self.condition:
+                    self.loss = loss
+                    self.updates += 1
+                    self.condition.notify_all()
+                if self.updates % agent.target_update_interval == 0:
+                    agent.syncTarget()
+                if self.updates - self.published >= self.maxStaleness:
+                    agent.publishWeights()
+                    self.published = self.updates
+        except Exception as error:
+            traceback.print_exc()
+            with self.condition:
+                self.error = error
+                self.condition.notify_all()
+
+    def stop(self):
+        """Waits for the owed updates and hands the agent's acting network the final weights"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.thread.join()
+        self.raiseError()
+        self.agent.publishWeights()
@@ -0,0 +1,84 @@
+import queue
+import threading
+import traceback
+
+import numpy as np
+
+"""Prepares a deep Q agent's next mini-batches in a worker thread while the current gradient step
+runs. The worker samples the replay memory, builds the inputs and the targets bootstrapped from the
+target network with the agent's calculateTargetValues, and copies them into one of depth batches
+allocated once and passed back and forth between the threads through two queues.
+
+Every batch records which target network it was computed with. The agent counts the times it
+copies the trained weights into the target network, and next() discards batches computed before
+the latest copy rather than training on stale targets.
+"""
+class BatchPrefetcher:
+    def __init__(self, agent, depth):
+        self.agent = agent
+        self.free = queue.Queue()
+        self.ready = queue.Queue()
+        for _ in range(max(1, int(depth))):
+            self.free.put(BatchPrefetcher.Batch())
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    class Batch:
+        def __init__(self):
+            self.inputs = None
+            self.targets = None
+            self.weights = None
+            self.indices = None
+            self.targetVersion = -1
+
+        def store(self, inputs, targets, weights, indices, targetVersion):
+            # the agent reuses its arrays for the next batch, so they are copied
+            if self.inputs is None:
+                self.inputs = [np.array(array) for array in inputs]
+                self.targets = np.array(targets)
+            else:
+                for out, array in zip(self.inputs, inputs):
+                    np.copyto(out, array)
+                np.copyto(self.targets, targets)
+            self.weights = weights
+            self.indices = indices
+            self.targetVersion = targetVersion
+
+    def run(self):
+        agent = self.agent
+        try:
+            while True:
+                batch = self.free.get()
+                if self.stopping:
+                    break
+                targetVersion = agent.targetVersion
+                with agent.memoryLock:
+                    mini_batch = agent.sample()
+                    weights = getattr(agent.memory, 'sampleWeights', None)
+                    indices = getattr(agent.memory, 'sampledIndices', None)
+                X_train, Y_train = agent.calculateTargetValues(mini_batch)
+                batch.store(X_train, Y_train, weights, indices, targetVersion)
+                self.ready.put(batch)
+        except Exception as error:
+            traceback.print_exc()
+            self.ready.put(error)
+
+    def next(self):
+        """Returns the next batch computed with the current target network; hand it back with release"""
+        while True:
+            batch = self.ready.get()
+            if isinstance(batch, Exception):
+                raise RuntimeError('preparing a batch failed') from batch
+            if batch.targetVersion == self.agent.targetVersion:
+                return batch
+            self.free.put(batch)
+
+    def release(self, batch):
+        self.free.put(batch)
+
+    def stop(self):
+        self.stopping = True
+        # wakes the worker if every batch is waiting to be used
+        self.free.put(None)
+        self.thread.join()
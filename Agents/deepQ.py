@@ -1,27 +1,51 @@
-from Agents import modelFreeAgent
+from Agents import modelFreeAgent, replayBuffer, numpyPolicy, asyncLearner, batchPrefetcher
 import numpy as np
-from collections import deque
-import random
-import joblib
+import threading
 
 
 class DeepQ(modelFreeAgent.ModelFreeAgent):
     displayName = 'Deep Q'
     newParameters = [modelFreeAgent.ModelFreeAgent.Parameter('Batch Size', 1, 256, 1, 32, True, True, "The number of transitions to consider simultaneously when updating the agent"),
                      modelFreeAgent.ModelFreeAgent.Parameter('Memory Size', 1, 655360, 1, 1000, True, True, "The maximum number of timestep transitions to keep stored"),
-                     modelFreeAgent.ModelFreeAgent.Parameter('Target Update Interval', 1, 100000, 1, 200, True, True, "The distance in timesteps between target model updates")]
+                     modelFreeAgent.ModelFreeAgent.Parameter('Target Update Interval', 1, 100000, 1, 200, True, True, "The distance in timesteps between target model updates"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Priority Alpha', 0.00, 1.00, 0.01, 0.0, True, True, "How strongly replay favours transitions with large TD errors; 0 samples uniformly"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Priority Beta', 0.00, 1.00, 0.01, 0.4, True, True, "How much of the bias of prioritized sampling is corrected by importance-sampling weights"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Learner Thread', 0, 1, 1, 0, True, True, "1 trains in a background thread while the agent acts; 0 trains inside every step"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Updates Per Step', 0.00, 16.00, 0.25, 1.0, True, True, "With the learner thread, the number of gradient steps taken per environment step"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Max Staleness', 1, 10000, 1, 10, True, True, "With the learner thread, the most gradient steps the acting network may lag behind the trained one"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Prefetch Batches', 0, 16, 1, 0, True, True, "The number of mini-batches prepared in a worker thread ahead of the gradient steps; 0 prepares each when it is needed")]
     parameters = modelFreeAgent.ModelFreeAgent.parameters + newParameters
+    supportsVectorEnv = True
 
     def __init__(self, *args):
         paramLen = len(DeepQ.newParameters)
         super().__init__(*args[:-paramLen])
-        self.batch_size, self.memory_size, self.target_update_interval = [int(arg) for arg in args[-paramLen:]]
+        self.batch_size, self.memory_size, self.target_update_interval = [int(arg) for arg in args[-paramLen:-paramLen+3]]
+        self.priorityAlpha, self.priorityBeta, self.useLearnerThread, self.updatesPerStep, self.maxStaleness, self.prefetchBatches = args[-paramLen+3:]
+        self.useLearnerThread = bool(self.useLearnerThread)
+        self.prefetchBatches = int(self.prefetchBatches)
         self.model = self.buildQNetwork()
         self.target = self.buildQNetwork()
-        self.memory = deque(maxlen=self.memory_size)
+        self.memory = replayBuffer.ReplayBuffer(self.memory_size, self.batch_size, self.createPriorities())
         self.total_steps = 0
         self.allMask = np.full((1, self.action_size), 1)
         self.allBatchMask = np.full((self.batch_size, self.action_size), 1)
+        # reused by every call to calculateTargetValues
+        self.batchActionMask = np.zeros((self.batch_size, self.action_size))
+        self.batchTargets = np.zeros((self.batch_size, self.action_size))
+        # compiled on the first single-state prediction, see predictOne
+        self.predictors = None
+        # held while memory is written or sampled; the learner thread and the prefetcher sample it
+        # while the agent adds to it
+        self.memoryLock = threading.Lock()
+        # with the learner thread, the agent acts with actor, a copy of model refreshed by the learner
+        self.learner = None
+        self.actor = None
+        self.actorLock = threading.Lock()
+        # started by the first gradient step when Prefetch Batches is set
+        self.prefetcher = None
+        # counts the copies into the target network, so prefetched targets can be told apart
+        self.targetVersion = 0
 
     def choose_action(self, state):
         qval = self.predict(state, False)
@@ -33,40 +57,152 @@ class DeepQ(modelFreeAgent.ModelFreeAgent):
             # action = self.state_size.sample()
         return action
 
+    def choose_actions(self, states):
+        shape = (len(states),) + self.state_size
+        states = np.reshape(states, shape)
+        with self.actorLock:
+            qval = self.actingNetwork().predict([states, np.full((len(states), self.action_size), 1)])
+        return list(np.argmax(qval, 1))
+
+    def actingNetwork(self):
+        return self.actor if self.actor is not None else self.model
+
+    def createPriorities(self):
+        if self.priorityAlpha > 0:
+            return replayBuffer.Priorities(self.memory_size, self.priorityAlpha, self.priorityBeta)
+        return None
+
     def sample(self):
-        return random.sample(self.memory, self.batch_size)
+        return self.memory.sample(self.batch_size)
 
     def addToMemory(self, state, action, reward, new_state, done):
-        self.memory.append((state, action, reward, new_state, done))
+        self.memory.append(state, action, reward, new_state, done)
+
+    def addBatchToMemory(self, states, actions, rewards, new_states, dones):
+        self.memory.appendBatch(states, actions, rewards, new_states, dones)
 
     def remember(self, state, action, reward, new_state, done=False):
-        self.addToMemory(state, action, reward, new_state, done)
+        with self.memoryLock:
+            self.addToMemory(state, action, reward, new_state, done)
+        if self.useLearnerThread:
+            return self.notifyLearner(1)
         loss = 0
         if len(self.memory) < 2*self.batch_size:
             return loss
-        mini_batch = self.sample()
+        loss = self.learn()
+        self.updateTarget()
+        return loss
 
+    def remember_batch(self, states, actions, rewards, new_states, dones):
+        with self.memoryLock:
+            self.addBatchToMemory(states, actions, rewards, new_states, dones)
+        if self.useLearnerThread:
+            return [self.notifyLearner(len(states))]*len(states)
+        # One gradient step per batch of lockstep transitions rather than one per transition
+        loss = 0
+        if len(self.memory) >= 2*self.batch_size:
+            loss = self.learn()
+        for _ in states:
+            self.updateTarget()
+        return [loss]*len(states)
+
+    def learn(self):
+        """Takes one gradient step on a mini-batch sampled from memory"""
+        if self.prefetchBatches:
+            if self.prefetcher is None:
+                self.prefetcher = batchPrefetcher.BatchPrefetcher(self, self.prefetchBatches)
+            batch = self.prefetcher.next()
+            try:
+                return self.trainOn(batch.inputs, batch.targets, batch.weights, batch.indices)
+            finally:
+                self.prefetcher.release(batch)
+        with self.memoryLock:
+            mini_batch = self.sample()
+            # set by a prioritized memory to correct for its sampling
+            weights = getattr(self.memory, 'sampleWeights', None)
+            indices = getattr(self.memory, 'sampledIndices', None)
         X_train, Y_train = self.calculateTargetValues(mini_batch)
-        loss = self.model.train_on_batch(X_train, Y_train)
-        self.updateTarget()
+        return self.trainOn(X_train, Y_train, weights, indices)
+
+    def trainOn(self, X_train, Y_train, weights, indices):
+        if weights is None:
+            return self.model.train_on_batch(X_train, Y_train)
+        # the model's outputs are masked to the taken action, as the targets are
+        errors = (Y_train - self.model.predict_on_batch(X_train)).sum(axis=1)
+        loss = self.model.train_on_batch(X_train, Y_train, sample_weight=weights)
+        with self.memoryLock:
+            self.memory.updatePriorities(indices, errors)
         return loss
 
+    def notifyLearner(self, steps):
+        """Hands the learner thread the steps just stored, once memory holds enough to train on"""
+        if len(self.memory) < 2*self.batch_size:
+            return 0
+        if self.learner is None:
+            if self.actor is None:
+                self.actor = self.buildQNetwork()
+                # traced again for the actor
+                self.predictors = None
+            self.publishWeights()
+            self.learner = asyncLearner.AsyncLearner(self, self.updatesPerStep, self.maxStaleness)
+        return self.learner.addSteps(steps)
+
+    def publishWeights(self):
+        if self.actor is not None:
+            weights = self.model.get_weights()
+            with self.actorLock:
+                self.actor.set_weights(weights)
+
+    def finishTraining(self):
+        learner, self.learner = self.learner, None
+        try:
+            if learner is not None:
+                learner.stop()
+        finally:
+            if self.prefetcher is not None:
+                self.prefetcher.stop()
+                self.prefetcher = None
+
     def updateTarget(self):
         if self.total_steps >= 2*self.batch_size and self.total_steps % self.target_update_interval == 0:
-            self.target.set_weights(self.model.get_weights())
-            print("target updated")
+            self.syncTarget()
         self.total_steps += 1
 
+    def syncTarget(self):
+        self.target.set_weights(self.model.get_weights())
+        self.targetVersion += 1
+        print("target updated")
+
     def predict(self, state, isTarget):
+        return self.predictOne([state], isTarget)
+
+    def compilePredictors(self):
         import tensorflow as tf
 
-        shape = (1,) + self.state_size
-        state = np.reshape(state, shape)
+        signature = [tf.TensorSpec((1,) + tuple(layer.shape[1:]), tf.float32) for layer in self.model.inputs]
+        self.inputBuffers = [np.zeros(spec.shape, dtype=np.float32) for spec in signature[:-1]]
+        self.singleMask = tf.ones((1, self.action_size))
+
+        def trace(network):
+            # the network is called rather than copied, so the function always uses its current weights
+            @tf.function(input_signature=signature)
+            def predictor(*inputs):
+                return network(list(inputs), training=False)
+            return predictor
+        self.predictors = (trace(self.actingNetwork()), trace(self.target))
+
+    def predictOne(self, inputs, isTarget):
+        """Evaluates the model or target network on a single sample, given its inputs without the action
+        mask. A traced function with a fixed signature is called on reused input arrays, which avoids the
+        data adapter and callbacks Model.predict sets up on every call."""
+        if self.predictors is None:
+            self.compilePredictors()
+        for buffer, value in zip(self.inputBuffers, inputs):
+            buffer[0] = np.reshape(value, buffer.shape[1:])
         if isTarget:
-            result = self.target.predict([state, self.allMask])
-        else:
-            result = self.model.predict([state, self.allMask])
-        return result
+            return self.predictors[1](*self.inputBuffers, self.singleMask).numpy()
+        with self.actorLock:
+            return self.predictors[0](*self.inputBuffers, self.singleMask).numpy()
 
     def update(self):
         pass
@@ -74,6 +210,21 @@ class DeepQ(modelFreeAgent.ModelFreeAgent):
     def reset(self):
         pass
 
+    def oneHot(self, actions, out):
+        """Writes the one-hot encodings of an array of actions into out, leaving the rows of -1 actions zero"""
+        out.fill(0)
+        hot = actions >= 0
+        out[np.nonzero(hot) + (actions[hot],)] = 1
+        return out
+
+    def fillTargets(self, actions, rewards, dones, qnext):
+        """The training targets of a batch: the bootstrapped return under each taken action and zero elsewhere,
+        matching the masked outputs of the network"""
+        targets = self.batchTargets if len(actions) == len(self.batchTargets) else np.zeros((len(actions), self.action_size))
+        targets.fill(0)
+        targets[np.arange(len(actions)), actions] = np.where(dones, rewards, rewards + qnext * self.gamma)
+        return targets
+
     def create_one_hot(self, vector_length, hot_index):
         output = np.zeros((vector_length))
         if hot_index != -1:
@@ -97,33 +248,23 @@ class DeepQ(modelFreeAgent.ModelFreeAgent):
         return model
 
     def calculateTargetValues(self, mini_batch):
-        X_train = [np.zeros((self.batch_size,) + self.state_size), np.zeros((self.batch_size,) + (self.action_size,))]
-        next_states = np.zeros((self.batch_size,) + self.state_size)
-
-        for index_rep, (state, action, reward, next_state, isDone) in enumerate(mini_batch):
-            X_train[0][index_rep] = state
-            X_train[1][index_rep] = self.create_one_hot(self.action_size, action)
-            next_states[index_rep] = next_state
+        states, actions, rewards, next_states, dones = mini_batch
+        X_train = [states, self.oneHot(actions, self.batchActionMask)]
 
-        Y_train = np.zeros((self.batch_size,) + (self.action_size,))
-        qnext = self.target.predict([next_states, self.allBatchMask])
+        qnext = self.target.predict_on_batch([next_states, self.allBatchMask])
         qnext = np.amax(qnext, 1)
-
-        for index_rep, (state, action, reward, next_state, isDone) in enumerate(mini_batch):
-            if isDone:
-                Y_train[index_rep][action] = reward
-            else:
-                Y_train[index_rep][action] = reward + qnext[index_rep] * self.gamma
-        return X_train, Y_train
+        return X_train, self.fillTargets(actions, rewards, dones, qnext)
 
     def __deepcopy__(self, memodict={}):
         pass
 
     def save(self, filename):
         mem = self.model.get_weights()
+        import joblib
         joblib.dump((DeepQ.displayName, mem), filename)
 
     def load(self, filename):
+        import joblib
         name, mem = joblib.load(filename)
         if name != DeepQ.displayName:
             print('load failed')
@@ -131,6 +272,21 @@ class DeepQ(modelFreeAgent.ModelFreeAgent):
             self.model.set_weights(mem)
             self.target.set_weights(mem)
 
+    def policyLayers(self):
+        """Describes the network buildQNetwork makes for Agents.numpyPolicy, or returns None if it cannot be described"""
+        return [['flatten'], ['dense', 'relu'], ['dense', 'relu'], ['dense', 'linear']]
+
+    def exportPolicy(self, filename):
+        layers = self.policyLayers()
+        if layers is None:
+            return super().exportPolicy(filename)
+        numpyPolicy.NumpyPolicy(layers, self.model.get_weights()).save(filename, **self.policyInfo())
+
+    def policyInfo(self):
+        """What numpyPolicy.PolicyAgent needs to know to test the exported policy"""
+        return {'displayName': self.displayName, 'stateSize': list(self.state_size), 'actionSize': self.action_size,
+                'epsilon': [self.min_epsilon, self.max_epsilon, self.decay_rate]}
+
     def memsave(self):
         return self.model.get_weights()
 
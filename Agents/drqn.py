@@ -1,14 +1,13 @@
 from Agents import deepQ
 import numpy as np
 import random
-from collections import deque
-import itertools
 
 
 class DRQN(deepQ.DeepQ):
     displayName = 'DRQN'
     newParameters = [deepQ.DeepQ.Parameter('History Length', 0, 20, 1, 10, True, True, "The number of recent timesteps to use as input")]
     parameters = deepQ.DeepQ.parameters + newParameters
+    supportsVectorEnv = False
 
     def __init__(self, *args):
         paramLen = len(DRQN.newParameters)
@@ -47,27 +46,25 @@ class DRQN(deepQ.DeepQ):
         model.compile(loss='mse', optimizer=Adam(lr=0.0001, clipvalue=1))
         return model
 
-    def calculateTargetValues(self, mini_batch):
-        X_train = [np.zeros((self.batch_size,) + (self.historylength,) + self.state_size), np.zeros((self.batch_size,) + (self.action_size,))]
-        next_states = np.zeros((self.batch_size,) + (self.historylength,) + self.state_size)
+    def policyLayers(self):
+        if len(self.state_size) == 1:
+            layers = [['timeDistributed', ['dense', 'relu']]]
+        else:
+            layers = [['timeDistributed', ['conv2d', 4, 'relu']], ['timeDistributed', ['conv2d', 2, 'relu']]]
+        return layers + [['timeDistributed', ['flatten']], ['lstm'], ['dense', 'relu'], ['dense', 'relu'], ['dense', 'linear']]
 
-        for index_rep, history in enumerate(mini_batch):
-            for histInd, (state, action, reward, next_state, isDone) in enumerate(history):
-                X_train[0][index_rep][histInd] = state
-                next_states[index_rep][histInd] = np.array(next_state)
-            X_train[1][index_rep] = self.create_one_hot(self.action_size, action)
+    def policyInfo(self):
+        info = super().policyInfo()
+        info['historyLength'] = self.historylength
+        return info
 
-        Y_train = np.zeros((self.batch_size,) + (self.action_size,))
-        qnext = self.target.predict([next_states, self.allBatchMask])
-        qnext = np.amax(qnext, 1)
+    def calculateTargetValues(self, mini_batch):
+        states, actions, rewards, next_states, dones = mini_batch
+        X_train = [states, self.oneHot(actions[:, -1], self.batchActionMask)]
 
-        for index_rep, history in enumerate(mini_batch):
-            state, action, reward, next_state, isDone = history[-1]
-            if isDone:
-                Y_train[index_rep][action] = reward
-            else:
-                Y_train[index_rep][action] = reward + qnext[index_rep] * self.gamma
-        return X_train, Y_train
+        qnext = self.target.predict_on_batch([next_states, self.allBatchMask])
+        qnext = np.amax(qnext, 1)
+        return X_train, self.fillTargets(actions[:, -1], rewards[:, -1], dones[:, -1], qnext)
 
     def choose_action(self, state):
         state = np.array(state)
@@ -75,18 +72,6 @@ class DRQN(deepQ.DeepQ):
         recent_state = np.concatenate([recent_state[1:], [state]], 0)
         return super().choose_action(recent_state)
 
-    def predict(self, state, isTarget):
-        import tensorflow as tf
-
-        shape = (1,) + (self.historylength,) + self.state_size
-        state = np.reshape(state, shape)
-        state = tf.cast(state, dtype=tf.float32)
-        if isTarget:
-            result = self.target.predict([state, self.allMask])
-        else:
-            result = self.model.predict([state, self.allMask])
-        return result
-
     def sample(self):
         return self.memory.sample(self.batch_size)
 
@@ -95,71 +80,114 @@ class DRQN(deepQ.DeepQ):
 
 
     class ReplayBuffer:
+        """Frames in preallocated arrays used as a ring buffer. A sampled history is the run of frames
+        from its start slot up to the end of the episode, the newest frame or historylength frames,
+        padded at the front with empty frames; the histories of a batch are gathered in one step."""
         def __init__(self, learner, maxlength, historylength):
             self.learner = learner
             self.maxlength = maxlength
             self.historylength = historylength
-            self.transitions = [None]*self.maxlength
             self.curIndex = 0
-            emptyState = self.getEmptyState()
-            self.emptyTrans = (emptyState, -1, 0, emptyState, False)
+            # histories are prioritized by the slot they start at
+            self.priorities = learner.createPriorities()
+            self.sampledIndices = None
+            self.sampleWeights = None
+            self.emptyState = self.getEmptyState()
+
+            shape = tuple(learner.state_size)
+            self.states = np.zeros((maxlength,) + shape, dtype=np.float32)
+            self.actions = np.zeros(maxlength, dtype=np.int64)
+            self.rewards = np.zeros(maxlength, dtype=np.float32)
+            self.nextStates = np.zeros((maxlength,) + shape, dtype=np.float32)
+            self.dones = np.zeros(maxlength, dtype=bool)
+            self.offsets = np.arange(historylength)
+            self.allocateBatch(learner.batch_size)
 
         def __len__(self):
             return self.curIndex
 
+        def fields(self):
+            return self.states, self.actions, self.rewards, self.nextStates, self.dones
+
+        def allocateBatch(self, batch_size):
+            """Allocates the arrays histories are gathered into, which are overwritten by the next sample"""
+            shape = (batch_size, self.historylength)
+            self.batch = tuple(np.zeros(shape + field.shape[1:], dtype=field.dtype) for field in self.fields())
+
         def getEmptyState(self):
-            shape = self.learner.state_size
-            if len(shape) >= 2:
-                return [[[-10000]] * shape[0] for _ in range(shape[1])]
-            return [-10000] * shape[0]
+            return np.full(self.learner.state_size, -10000, dtype=np.float32)
 
         def appendFrame(self, state, action, reward, next_state, isdone):
-            self.transitions[self.curIndex % self.maxlength] = (state, action, reward, next_state, isdone)
+            ind = self.curIndex % self.maxlength
+            self.states[ind] = state
+            self.actions[ind] = action
+            self.rewards[ind] = reward
+            self.nextStates[ind] = next_state
+            self.dones[ind] = isdone
+            if self.priorities:
+                self.priorities.add(ind)
             self.curIndex += 1
 
-        def getTransitions(self, startInd):
-            result = []
+        def historySlots(self, starts):
+            """Returns the slots of the histories beginning at the given slots, shape (len(starts),
+            historylength), aligned to the end and -1 where padded"""
+            size = min(self.maxlength, self.curIndex)
             limit = (self.curIndex-1)%self.maxlength
-            for ind in range(startInd, startInd+self.historylength):
-                ind %= self.maxlength
-                transition = self.transitions[ind]
-                if transition is None:
-                    break
-                result.append(transition)
-                if transition[4] or ind == limit:
-                    break
-            return self.pad(result)
-
-        def pad(self, transitions):
-            pad = [self.emptyTrans for _ in
-                   range(self.historylength - len(transitions))]
-            return pad + transitions
-
-        def sample(self, batch_size):
-            result = []
-            for ind in random.sample(range(min(self.maxlength, self.curIndex)), batch_size):
-                result.append(self.getTransitions(ind))
-            return result
-
-        def get_recent_state(self):
-            result = [None]*self.historylength
-            resInd = self.historylength-1
+            slots = (np.asarray(starts)[:, None] + self.offsets) % self.maxlength
+            stops = self.dones[slots] | (slots == limit)
+            # a frame is part of the history if it has been written and no frame before it ended the history
+            ended = np.cumsum(stops, axis=1) - stops > 0
+            valid = np.logical_and.accumulate((slots < size) & ~ended, axis=1)
+            sources = self.offsets - (self.historylength - valid.sum(axis=1))[:, None]
+            return np.where(sources >= 0, np.take_along_axis(slots, np.maximum(sources, 0), axis=1), -1)
+
+        def recentSlots(self):
+            """Returns the slots of the newest frame and the frames of its episode before it, aligned to the end
+            and -1 where padded"""
+            slots = np.full(self.historylength, -1)
+            if not self.curIndex:
+                return slots
+            size = min(self.maxlength, self.curIndex)
             start = (self.curIndex-1)%self.maxlength
-            transition = self.transitions[start]
-            result[resInd] = transition[0]
-            resInd -= 1
-            for ind in range(start-1, start-self.historylength, -1):
-                ind %= self.maxlength
-                transition = self.transitions[ind]
-                if not transition or transition[4]:
+            slots[-1] = start
+            for histInd in range(self.historylength-2, -1, -1):
+                ind = (start - (self.historylength-1 - histInd)) % self.maxlength
+                if ind >= size or self.dones[ind]:
                     break
-                result[resInd] = transition[0]
-                resInd -= 1
+                slots[histInd] = ind
+            return slots
+
+        def gather(self, slots):
+            padded = slots < 0
+            slots = np.maximum(slots, 0)
+            if len(slots) != len(self.batch[0]):
+                self.allocateBatch(len(slots))
+            for field, out in zip(self.fields(), self.batch):
+                np.take(field, slots, axis=0, out=out)
+            states, actions, rewards, nextStates, dones = self.batch
+            states[padded] = self.emptyState
+            actions[padded] = -1
+            rewards[padded] = 0
+            nextStates[padded] = self.emptyState
+            dones[padded] = False
+            return self.batch
 
-            emptyState = self.getEmptyState()
+        def sample(self, batch_size):
+            """Returns the (states, actions, rewards, next states, dones) of batch_size histories as arrays
+            of shape (batch_size, historylength, ...)"""
+            size = min(self.maxlength, self.curIndex)
+            if self.priorities:
+                self.sampledIndices, self.sampleWeights = self.priorities.sample(batch_size, size)
+                starts = self.sampledIndices
+            else:
+                starts = np.fromiter(random.sample(range(size), batch_size), dtype=np.intp, count=batch_size)
+            return self.gather(self.historySlots(starts))
 
-            while resInd >= 0:
-                result[resInd] = emptyState
-                resInd -= 1
+        def updatePriorities(self, indices, errors):
+            self.priorities.update(indices, errors)
 
-            return result
\ No newline at end of file
+        def get_recent_state(self):
+            slots = self.recentSlots()
+            states = self.states[np.maximum(slots, 0)]
+            states[slots < 0] = self.emptyState
+            return states
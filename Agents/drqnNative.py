@@ -2,8 +2,6 @@ from Agents import modelFreeAgent
 import numpy as np
 from collections import deque
 import random
-import joblib
-import cffi
 import os
 import pathlib
 import platform
@@ -26,6 +24,7 @@ class DRQNNative(modelFreeAgent.ModelFreeAgent):
         curDir = oldwd / "Agents/Native/drqnNative"
         os.chdir(curDir.as_posix())
 
+        import cffi
         self.ffi = cffi.FFI()
         if platform.system() == "Windows":
             if not importlib.util.find_spec("Agents.Native.drqnNative.Release._drqnNative"):
@@ -0,0 +1,48 @@
+import numpy as np
+
+from Agents import qLearning, MDP
+
+
+class DynaQ(qLearning.QLearning):
+    displayName = 'Dyna-Q'
+    newParameters = [qLearning.QLearning.Parameter('Planning Steps', 0, 200, 1, 10, True, True, "The number of simulated updates drawn from the learned model after each real step")]
+    parameters = qLearning.QLearning.parameters + newParameters
+    # planning happens in remember, which the compiled loop does not call
+    kernelUpdate = None
+
+    def __init__(self, *args):
+        paramLen = len(DynaQ.newParameters)
+        super().__init__(*args[:-paramLen])
+        (self.planningSteps,) = [int(arg) for arg in args[-paramLen:]]
+        self.model = MDP.LearnedModel(self.action_size)
+
+    def remember(self, state, action, reward, new_state, done=False):
+        loss = super().remember(state, action, reward, new_state, done)
+        self.model.observe(state, action, reward, new_state, done)
+        if self.planningSteps:
+            self.plan(self.planningSteps)
+        return loss
+
+    def plan(self, number):
+        """Applies Q-learning updates to outcomes replayed from the model. The whole batch is computed
+        from the Q-values as they were before it, then written back at once."""
+        model = self.model
+        inds = model.sample(number)
+        rows = model.rows[inds]
+        states = [model.states[stateId] for stateId in (rows // self.action_size).tolist()]
+        actions = rows % self.action_size
+        newStates = [model.states[stateId] for stateId in model.nextStates[inds].tolist()]
+        targets = model.meanRewards(inds) + np.where(model.dones[inds], 0, self.gamma * self.qtable.maxBatch(newStates))
+        current = self.qtable.getBatch(states, actions)
+        self.qtable.setBatch(states, actions, current + self.alpha * (targets - current))
+
+    def memsave(self):
+        return super().memsave(), self.model
+
+    def memload(self, mem):
+        table, self.model = mem
+        super().memload(table)
+
+    def reset(self):
+        super().reset()
+        self.model.clear()
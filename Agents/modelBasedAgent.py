@@ -1,7 +1,106 @@
-from abc import ABC
+import random
+import time
+from abc import ABC, abstractmethod
 
-from Agents import agent
+import numpy as np
 
+from Agents import agent, MDP
 
+"""This is an abstract model-based agent class. Model-based agents compute their policy from the
+environment's full transition model, which the Model passes to setTransitions, instead of learning
+it from sampled episodes. The policy is planned the first time an action is chosen and followed
+greedily afterwards, so the Model's exploration schedule is switched off.
+"""
 class ModelBasedAgent(agent.Agent, ABC):
     displayName = 'Model Based Agent'
+    newParameters = [agent.Agent.Parameter('Tolerance', 0.00, 1.00, 0.000001, 0.0001, False, True, "Values count as converged once no state's value changes by more than this in a sweep"),
+                     agent.Agent.Parameter('Max Iterations', 1, 100000, 1, 1000, False, True, "The most sweeps over the state space that planning may take")]
+    parameters = agent.Agent.parameters + newParameters
+
+    min_epsilon = max_epsilon = decay_rate = 0
+
+    def __init__(self, *args):
+        """Constructor method
+        :param args: the parameters associated with the agent
+        :type args: tuple
+        """
+        paramLen = len(ModelBasedAgent.newParameters)
+        super().__init__(*args[:-paramLen])
+        self.tolerance, self.maxIterations = args[-paramLen:]
+        self.maxIterations = int(self.maxIterations)
+        self.stateBins = None
+        self.mdp = None
+        self.values = None
+        self.policy = None
+        self.planned = False
+        # the cost of the last planning run, for comparing solvers
+        self.backups = 0
+        self.planTime = 0
+
+    def setStateBins(self, stateBins):
+        self.stateBins = tuple(stateBins)
+
+    def setTransitions(self, transitions):
+        self.mdp = MDP.MDP.fromTransitions(transitions, self.action_size)
+        self.planned = False
+
+    def stateIndex(self, state):
+        return int(np.ravel_multi_index(state, self.stateBins))
+
+    def choose_action(self, state):
+        if not self.planned:
+            self.plan()
+        if self.policy is None:
+            return random.randrange(self.action_size)
+        return int(self.policy[self.stateIndex(state)])
+
+    def plan(self):
+        if self.mdp is None:
+            return
+        if self.values is None or len(self.values) != self.mdp.numStates:
+            self.values = np.zeros(self.mdp.numStates)
+            self.policy = np.zeros(self.mdp.numStates, dtype=np.intp)
+        start = time.perf_counter()
+        self.backups = self.solve()
+        self.planTime = time.perf_counter() - start
+        print('{} planned with {} state backups ({:.1f} sweeps) in {:.1f} ms'.format(
+            self.displayName, self.backups, self.backups / self.mdp.numStates, 1000 * self.planTime))
+        self.planned = True
+
+    @abstractmethod
+    def solve(self):
+        """Computes self.values and self.policy from self.mdp, starting from their current contents
+        :return: the number of single-state backups performed
+        :rtype: int
+        """
+        pass
+
+    def remember(self, state, action, reward, new_state, done=False):
+        # the policy comes from the model; there is no loss to report
+        return None
+
+    def save(self, filename):
+        import joblib
+        joblib.dump((self.displayName, self.memsave()), filename)
+
+    def load(self, filename):
+        import joblib
+        name, mem = joblib.load(filename)
+        if name != self.displayName:
+            print('load failed')
+        else:
+            self.memload(mem)
+            self.planned = True
+            print('load successful')
+
+    def memsave(self):
+        return self.values, self.policy
+
+    def memload(self, mem):
+        # kept as the starting point when the policy is planned again
+        self.values, self.policy = mem
+
+    def reset(self):
+        self.values = None
+        self.policy = None
+        self.planned = False
@@ -38,6 +38,18 @@ class ModelFreeAgent(agent.Agent, ABC):
         """
         pass
 
+    def remember_batch(self, states, actions, rewards, new_states, dones):
+        """'Remembers' one transition from each of several environment copies
+        :param states: the original states of the environments
+        :param actions: the actions the agent took
+        :param rewards: the rewards the agent observed
+        :param new_states: the new states of the environments
+        :param dones: whether each episode was finished after taking the action
+        :return: the loss reported for each transition
+        :rtype: list
+        """
+        return [self.remember(*transition) for transition in zip(states, actions, rewards, new_states, dones)]
+
     @abstractmethod
     def reset(self):
         """Resets the agent to its original state, removing the results of any training
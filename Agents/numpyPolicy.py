@@ -0,0 +1,151 @@
+import json
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+"""Evaluates the Q-networks of trained deep Q agents with NumPy alone, so that testing an exported
+agent neither imports TensorFlow nor builds Keras models. An agent exports its network as a list of
+layer descriptions and the arrays of its model.get_weights(), in the order the layers consume them:
+
+    ['dense', activation]               kernel, bias
+    ['conv2d', stride, activation]      kernel, bias (valid padding, channels last)
+    ['lstm']                            kernel, recurrent kernel, bias (Keras gate order i, f, c, o)
+    ['flatten']
+    ['timeDistributed', layer]          applies layer to every timestep
+
+The network's final action mask is left out; forward returns the Q-values of every action. Every
+layer works on a whole batch of inputs at once.
+"""
+EXTENSION = '.npz'
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    # written with tanh, which cannot overflow
+    'sigmoid': lambda x: 0.5 * (1 + np.tanh(0.5 * x)),
+}
+
+
+def isPolicyFile(filename):
+    return str(filename).endswith(EXTENSION)
+
+
+class NumpyPolicy:
+    def __init__(self, layers, weights):
+        self.layers = layers
+        self.weights = [np.asarray(weight, dtype=np.float32) for weight in weights]
+
+    def forward(self, inputs):
+        """Returns the Q-values of a batch of inputs, shape (batch, action_size)"""
+        x = np.asarray(inputs, dtype=np.float32)
+        weights = iter(self.weights)
+        for layer in self.layers:
+            x = NumpyPolicy.apply(layer, x, weights)
+        return x
+
+    @staticmethod
+    def apply(layer, x, weights):
+        kind = layer[0]
+        if kind == 'dense':
+            # matmul works on the last axis, so this also covers dense layers over timesteps
+            kernel, bias = next(weights), next(weights)
+            return ACTIVATIONS[layer[1]](x @ kernel + bias)
+        if kind == 'flatten':
+            return x.reshape(len(x), -1)
+        if kind == 'conv2d':
+            kernel, bias = next(weights), next(weights)
+            stride = layer[1]
+            # (batch, rows, columns, channels, kernel rows, kernel columns), without copying
+            windows = sliding_window_view(x, kernel.shape[:2], axis=(1, 2))[:, ::stride, ::stride]
+            return ACTIVATIONS[layer[2]](np.tensordot(windows, kernel, axes=([3, 4, 5], [2, 0, 1])) + bias)
+        if kind == 'lstm':
+            return NumpyPolicy.lstm(x, next(weights), next(weights), next(weights))
+        if kind == 'timeDistributed':
+            batch, steps = x.shape[:2]
+            y = NumpyPolicy.apply(layer[1], x.reshape((batch * steps,) + x.shape[2:]), weights)
+            return y.reshape((batch, steps) + y.shape[1:])
+        raise ValueError('unknown layer ' + str(kind))
+
+    @staticmethod
+    def lstm(x, kernel, recurrentKernel, bias):
+        """Runs a Keras LSTM with tanh and sigmoid activations over (batch, timesteps, features) and
+        returns its last output"""
+        units = recurrentKernel.shape[0]
+        sigmoid = ACTIVATIONS['sigmoid']
+        # the input contributions of every timestep in one product
+        inputs = x @ kernel + bias
+        h = np.zeros((len(x), units), dtype=np.float32)
+        c = np.zeros((len(x), units), dtype=np.float32)
+        for step in range(x.shape[1]):
+            z = inputs[:, step] + h @ recurrentKernel
+            i, f, g, o = (z[:, k * units:(k + 1) * units] for k in range(4))
+            c = sigmoid(f) * c + sigmoid(i) * np.tanh(g)
+            h = sigmoid(o) * np.tanh(c)
+        return h
+
+    def save(self, filename, **info):
+        """Writes the layers, any extra information about the agent and the weights to a .npz file"""
+        arrays = {'weight' + str(ind): weight for ind, weight in enumerate(self.weights)}
+        header = json.dumps({'layers': self.layers, 'info': info})
+        with open(filename, 'wb') as file:
+            np.savez_compressed(file, header=np.array(header), **arrays)
+
+    @staticmethod
+    def load(filename):
+        """Returns the policy and the extra information saved with it"""
+        with np.load(filename) as data:
+            header = json.loads(str(data['header']))
+            weights = [data['weight' + str(ind)] for ind in range(len(data.files) - 1)]
+        return NumpyPolicy(header['layers'], weights), header['info']
+
+
+class PolicyAgent:
+    """Stands in for a deep Q agent exported with exportPolicy when the Model tests it. Agents that
+    look at a history of states keep the states of the current episode, as the DRQN does."""
+    def __init__(self, policy, info):
+        self.policy = policy
+        self.info = info
+        self.displayName = info['displayName']
+        self.state_size = tuple(info['stateSize'])
+        self.action_size = info['actionSize']
+        self.historylength = info.get('historyLength', 0)
+        self.min_epsilon, self.max_epsilon, self.decay_rate = info['epsilon']
+        if self.historylength:
+            self.emptyState = np.full(self.state_size, -10000, dtype=np.float32)
+            self.recent = np.empty((self.historylength,) + self.state_size, dtype=np.float32)
+            self.history = np.empty((1, self.historylength) + self.state_size, dtype=np.float32)
+            self.reset()
+
+    @staticmethod
+    def fromFile(filename):
+        return PolicyAgent(*NumpyPolicy.load(filename))
+
+    def choose_action(self, state):
+        if self.historylength:
+            self.history[0, :-1] = self.recent[1:]
+            self.history[0, -1] = np.reshape(state, self.state_size)
+            return int(self.policy.forward(self.history)[0].argmax())
+        return int(self.policy.forward(np.reshape(state, (1,) + self.state_size))[0].argmax())
+
+    def choose_actions(self, states):
+        if self.historylength:
+            return [self.choose_action(state) for state in states]
+        return self.policy.forward(np.reshape(states, (len(states),) + self.state_size)).argmax(axis=1).tolist()
+
+    def addToMemory(self, state, action, reward, new_state, done):
+        if not self.historylength:
+            return
+        if self.episodeEnded:
+            self.recent[...] = self.emptyState
+        self.recent[:-1] = self.recent[1:]
+        self.recent[-1] = np.reshape(state, self.state_size)
+        self.episodeEnded = done
+
+    def reset(self):
+        if self.historylength:
+            self.recent[...] = self.emptyState
+            self.episodeEnded = False
+
+    def save(self, filename):
+        self.policy.save(filename, **self.info)
@@ -1,17 +1,51 @@
+import numpy as np
+
 from Agents import modelBasedAgent
 
 
 class PolicyIteration(modelBasedAgent.ModelBasedAgent):
-    def __init__(self):
-        super().__init__()
-        self.value = []
-        self.policy = []
+    displayName = 'Policy Iteration'
+    newParameters = [modelBasedAgent.ModelBasedAgent.Parameter('Exact Evaluation', 0, 1, 1, 1, True, True, "1 evaluates each policy by solving its linear system directly, 0 by sweeping until the values converge")]
+    parameters = modelBasedAgent.ModelBasedAgent.parameters + newParameters
+
+    def __init__(self, *args):
+        paramLen = len(PolicyIteration.newParameters)
+        super().__init__(*args[:-paramLen])
+        (self.exactEvaluation,) = [bool(int(arg)) for arg in args[-paramLen:]]
 
-    def update(self):
-        super().update()
+    def solve(self):
+        sweeps = 0
+        states = np.arange(self.mdp.numStates)
+        while sweeps < self.maxIterations:
+            sweeps += self.evaluate() + 1
+            qValues = self.mdp.qValues(self.values, self.gamma)
+            # only switch actions that are better by more than the tolerance, so ties cannot make it cycle
+            improved = qValues.max(axis=1) > qValues[states, self.policy] + self.tolerance
+            if not improved.any():
+                break
+            self.policy = np.where(improved, qValues.argmax(axis=1), self.policy)
+        return sweeps * self.mdp.numStates
 
-    def choose_action(self, state):
-        super().choose_action(state)
+    def evaluate(self):
+        """Computes the values of the current policy, returning the number of sweeps it took; a direct
+        solve counts as one"""
+        if self.exactEvaluation:
+            matrix, rewards = self.mdp.policyMatrix(self.policy)
+            try:
+                self.values = np.linalg.solve(np.eye(self.mdp.numStates) - self.gamma * matrix, rewards)
+                return 1
+            except np.linalg.LinAlgError:
+                # singular when gamma is 1 and the policy can loop forever; sweeping still converges
+                pass
+        states, nextStates, probabilities, rewards = self.mdp.policyModel(self.policy)
+        for sweep in range(1, self.maxIterations + 1):
+            values = rewards + self.gamma * np.bincount(states, probabilities * self.values[nextStates],
+                                                        minlength=self.mdp.numStates)
+            delta = abs(values - self.values).max()
+            self.values = values
+            if delta <= self.tolerance:
+                break
+        return sweep
 
     def __deepcopy__(self, memodict={}):
         pass
@@ -2,8 +2,6 @@ from Agents import modelFreeAgent
 import numpy as np
 from collections import deque
 import random
-import joblib
-import cffi
 import os
 import pathlib
 import platform
@@ -41,6 +39,7 @@ class PPONative(modelFreeAgent.ModelFreeAgent):
         curDir = oldwd / "Agents/Native/ppoNative"
         os.chdir(curDir.as_posix())
 
+        import cffi
         self.ffi = cffi.FFI()
         if platform.system() == "Windows":
             if not importlib.util.find_spec("Agents.Native.ppoNative.Release._ppoNative"):
@@ -1,21 +1,22 @@
-from Agents import qTable
-import joblib
+from Agents import qTable, tabularKernel
 
 class QLearning(qTable.QTable):
     displayName = 'Q Learning'
+    supportsVectorEnv = True
+    kernelUpdate = tabularKernel.Q_LEARNING
 
     def __init__(self, *args):
         super().__init__(*args)
 
     def remember(self, state, action, reward, new_state, done=False):
         prevQValue = self.getQvalue(state, action)
-        newQValue = self.getQvalue(new_state, self.choose_action(new_state))
+        newQValue = self.qtable.max(new_state)
         if done:
             target = reward
         else:
             target = reward + self.gamma * newQValue
         loss = target - prevQValue
-        self.qtable[(state, action)] = prevQValue + self.alpha * loss
+        self.setQvalue(state, action, prevQValue + self.alpha * loss)
         return loss**2
 
     def __deepcopy__(self, memodict={}):
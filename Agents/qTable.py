@@ -1,53 +1,346 @@
 from abc import ABC
 import numpy as np
-import joblib
 from Agents import modelFreeAgent
 
 
 class QTable(modelFreeAgent.ModelFreeAgent, ABC):
     displayName = 'Q Table'
-    newParameters = [modelFreeAgent.ModelFreeAgent.Parameter('Alpha', 0.00, 1.00, 0.01, 0.18, True, True, "The learning rate factor which determines how quickly we use new data")]
+    newParameters = [modelFreeAgent.ModelFreeAgent.Parameter('Alpha', 0.00, 1.00, 0.01, 0.18, True, True, "The learning rate factor which determines how quickly we use new data"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Max States', 0, 2**26, 1, 0, False, True, "The most states the Q-table keeps; beyond it states are evicted. 0 keeps every state")]
     parameters = modelFreeAgent.ModelFreeAgent.parameters + newParameters
 
+    # state spaces with more (state, action) pairs than this keep the dictionary table
+    MAX_DENSE_SIZE = 2**24
+    # which states a capped table evicts first, see HashedTable
+    evictionPolicy = 'lru'
+    # the update rule Agents.tabularKernel applies for this agent, None if it cannot train it
+    kernelUpdate = None
+
     def __init__(self, *args):
         paramLen = len(QTable.newParameters)
         super().__init__(*args[:-paramLen])
-        (self.alpha,) = args[-paramLen:]
-        self.qtable = {}
+        self.alpha, self.maxStates = args[-paramLen:]
+        self.maxStates = int(self.maxStates)
+        self.stateBins = None
+        self.qtable = self.makeTable({})
+
+    def setStateBins(self, stateBins):
+        if stateBins and int(np.prod(stateBins)) * self.action_size <= QTable.MAX_DENSE_SIZE:
+            self.stateBins = tuple(stateBins)
+            self.qtable = self.makeTable(self.qtable)
+
+    def makeTable(self, mem):
+        """Builds the table for the current state space from a table, or the dictionary or array of
+        Q-values of a saved one. A dense table is used when the state space is known and small, a hashed
+        table when the number of states is capped, and a dictionary otherwise."""
+        if isinstance(mem, QTable.DenseTable):
+            return mem
+        if isinstance(mem, QTable.HashedTable):
+            # a hashed table stays one, resized to the current cap
+            if self.maxStates:
+                mem.resize(self.maxStates)
+            return mem
+        if isinstance(mem, np.ndarray):
+            return QTable.DenseTable(mem)
+        if isinstance(mem, QTable.DictTable):
+            mem = mem.values
+        if self.stateBins:
+            table = QTable.DenseTable(np.zeros(self.stateBins + (self.action_size,)))
+        elif self.maxStates:
+            table = QTable.HashedTable(self.action_size, self.maxStates, self.evictionPolicy)
+        else:
+            return QTable.DictTable(self.action_size, mem)
+        for (state, action), value in mem.items():
+            table.set(state, action, value)
+        return table
 
     def getQvalue(self, state, action):
-        return self.qtable.get((state, action), 0.0)
+        return self.qtable.get(state, action)
+
+    def setQvalue(self, state, action, value):
+        self.qtable.set(state, action, value)
 
     def choose_action(self, state):
-        q = [self.getQvalue(state, a) for a in range(self.action_size)]
-        maxQ = max(q)
-        epsilon = self.min_epsilon + (self.max_epsilon - self.min_epsilon) * np.exp(-self.decay_rate * self.time_steps)
-        # TODO: Put epsilon at a level near this
-        # if random.random() > epsilon:
-        action = q.index(maxQ)
-        # else:
-        #     action = self.state_size.sample()
-        return action
+        # exploration is handled by the Model's epsilon schedule
+        return self.qtable.best(state)
+
+    def choose_actions(self, states):
+        return self.qtable.bestBatch(states)
 
     def __compute_new_q_value(self):
         pass
 
     def save(self, filename):
-        joblib.dump((self.displayName, self.qtable), filename)
+        import joblib
+        mem = self.qtable if isinstance(self.qtable, QTable.HashedTable) else self.qtable.values
+        joblib.dump((self.displayName, mem), filename)
 
     def load(self, filename):
+        import joblib
         name, mem = joblib.load(filename)
         if name != self.displayName:
             print('load failed')
         else:
-            self.qtable = mem
+            self.qtable = self.makeTable(mem)
             print('load successful')
 
     def memsave(self):
         return self.qtable
 
     def memload(self, mem):
-        self.qtable = mem
+        self.qtable = self.makeTable(mem)
 
     def reset(self):
         self.qtable.clear()
+
+    class DictTable:
+        """Q-values in a dictionary keyed by (state, action), for state spaces that are not known in advance"""
+        def __init__(self, action_size, values=None):
+            self.action_size = action_size
+            self.values = {} if values is None else values
+
+        def get(self, state, action):
+            return self.values.get((state, action), 0.0)
+
+        def set(self, state, action, value):
+            self.values[(state, action)] = value
+
+        def best(self, state):
+            q = [self.values.get((state, a), 0.0) for a in range(self.action_size)]
+            return q.index(max(q))
+
+        def bestBatch(self, states):
+            return [self.best(state) for state in states]
+
+        def max(self, state):
+            return max(self.values.get((state, a), 0.0) for a in range(self.action_size))
+
+        def getBatch(self, states, actions):
+            return np.array([self.get(state, action) for state, action in zip(states, actions)])
+
+        def setBatch(self, states, actions, values):
+            for state, action, value in zip(states, actions, values.tolist()):
+                self.set(state, action, value)
+
+        def maxBatch(self, states):
+            return np.array([self.max(state) for state in states])
+
+        def clear(self):
+            self.values.clear()
+
+    class DenseTable:
+        """Q-values in an array of shape stateBins + (action_size,), indexed directly by the state tuple.
+        It always takes prod(stateBins) * action_size * 8 bytes."""
+        def __init__(self, values):
+            self.values = values
+
+        def get(self, state, action):
+            return self.values.item(state + (action,))
+
+        def set(self, state, action, value):
+            self.values[state + (action,)] = value
+
+        def best(self, state):
+            return int(self.values[state].argmax())
+
+        def bestBatch(self, states):
+            rows = self.values[tuple(np.asarray(states, dtype=np.intp).T)]
+            return rows.argmax(axis=1).tolist()
+
+        def max(self, state):
+            # cheaper than ndarray.max for the handful of actions these environments have
+            return max(self.values[state].tolist())
+
+        def getBatch(self, states, actions):
+            return self.values[tuple(np.asarray(states, dtype=np.intp).T) + (np.asarray(actions),)]
+
+        def setBatch(self, states, actions, values):
+            # where a state and action repeat, the last value is kept
+            self.values[tuple(np.asarray(states, dtype=np.intp).T) + (np.asarray(actions),)] = values
+
+        def maxBatch(self, states):
+            return self.values[tuple(np.asarray(states, dtype=np.intp).T)].max(axis=1)
+
+        def clear(self):
+            self.values.fill(0)
+
+    class HashedTable:
+        """Q-values for large or open-ended state spaces, in an open-addressing hash table held in NumPy
+        arrays: slot i stores the hash of a state in keys[i], the state itself in states[i] and its row
+        of action values in values[i], about (action_size + 4) * 8 bytes per slot besides the states.
+        Probing compares hashes first and the states only when the hashes match, so states whose hashes
+        collide keep separate rows.
+
+        The table keeps at most maxStates states. When it is full, the EVICT_FRACTION of states used
+        longest ago ('lru') or updated fewest times ('visits') are dropped in one vectorized pass."""
+        EMPTY = np.iinfo(np.int64).min
+        DELETED = EMPTY + 1
+        MAX_LOAD = 0.75
+        EVICT_FRACTION = 1 / 16
+
+        def __init__(self, action_size, maxStates, policy='lru'):
+            self.action_size = action_size
+            self.policy = policy
+            self.maxStates = maxStates
+            self.allocate(QTable.HashedTable.capacityFor(maxStates))
+
+        @staticmethod
+        def capacityFor(maxStates):
+            capacity = 8
+            while capacity * QTable.HashedTable.MAX_LOAD < maxStates:
+                capacity *= 2
+            return capacity
+
+        def allocate(self, capacity):
+            self.mask = capacity - 1
+            self.keys = np.full(capacity, QTable.HashedTable.EMPTY, dtype=np.int64)
+            self.states = np.empty(capacity, dtype=object)
+            self.values = np.zeros((capacity, self.action_size))
+            self.lastUsed = np.zeros(capacity, dtype=np.int64)
+            self.visits = np.zeros(capacity, dtype=np.int64)
+            self.count = 0
+            # slots holding a state or a deletion marker; probing stops only at EMPTY slots
+            self.occupied = 0
+            self.clock = 0
+
+        @staticmethod
+        def hash(state):
+            """Returns the key and the hashable form of a state"""
+            if type(state) is not tuple:
+                state = tuple(np.ravel(state).tolist())
+            key = hash(state)
+            # the two marker values cannot be used as keys
+            return (key + 2 if key <= QTable.HashedTable.DELETED else key), state
+
+        def find(self, key, state):
+            """Returns the slot holding state, or -1"""
+            keys = self.keys
+            slot = key & self.mask
+            while True:
+                current = keys[slot]
+                if current == key and self.states[slot] == state:
+                    return slot
+                if current == QTable.HashedTable.EMPTY:
+                    return -1
+                slot = (slot + 1) & self.mask
+
+        def insert(self, key, state):
+            """Adds a state that is not in the table and returns its slot"""
+            if self.count >= self.maxStates:
+                self.evict()
+            if self.occupied + 1 > QTable.HashedTable.MAX_LOAD * len(self.keys):
+                self.rehash(len(self.keys))
+            keys = self.keys
+            slot = key & self.mask
+            while keys[slot] > QTable.HashedTable.DELETED:
+                slot = (slot + 1) & self.mask
+            if keys[slot] == QTable.HashedTable.EMPTY:
+                self.occupied += 1
+            keys[slot] = key
+            self.states[slot] = state
+            self.values[slot] = 0
+            self.visits[slot] = 0
+            self.count += 1
+            return slot
+
+        def touch(self, slot):
+            self.clock += 1
+            self.lastUsed[slot] = self.clock
+
+        def get(self, state, action):
+            slot = self.find(*QTable.HashedTable.hash(state))
+            if slot < 0:
+                return 0.0
+            self.touch(slot)
+            return self.values.item(slot, action)
+
+        def set(self, state, action, value):
+            key, state = QTable.HashedTable.hash(state)
+            slot = self.find(key, state)
+            if slot < 0:
+                slot = self.insert(key, state)
+            self.touch(slot)
+            self.visits[slot] += 1
+            self.values[slot, action] = value
+
+        def row(self, state):
+            slot = self.find(*QTable.HashedTable.hash(state))
+            if slot < 0:
+                return None
+            self.touch(slot)
+            return self.values[slot]
+
+        def best(self, state):
+            row = self.row(state)
+            return 0 if row is None else int(row.argmax())
+
+        def bestBatch(self, states):
+            keys, identities = zip(*[QTable.HashedTable.hash(state) for state in states])
+            keys = np.array(keys, dtype=np.int64)
+            slots = keys & self.mask
+            found = np.full(len(keys), -1)
+            pending = np.arange(len(keys))
+            # probe every state in lockstep until each one hits its state or an empty slot
+            while len(pending):
+                current = self.keys[slots[pending]]
+                hit = current == keys[pending]
+                # matching hashes are confirmed against the stored states
+                hit[hit] = [self.states[slots[ind]] == identities[ind] for ind in pending[hit].tolist()]
+                found[pending[hit]] = slots[pending[hit]]
+                pending = pending[~hit & (current != QTable.HashedTable.EMPTY)]
+                slots[pending] = (slots[pending] + 1) & self.mask
+            rows = np.where((found >= 0)[:, None], self.values[found], 0)
+            return rows.argmax(axis=1).tolist()
+
+        def max(self, state):
+            row = self.row(state)
+            return 0.0 if row is None else max(row.tolist())
+
+        def getBatch(self, states, actions):
+            return np.array([self.get(state, action) for state, action in zip(states, actions)])
+
+        def setBatch(self, states, actions, values):
+            for state, action, value in zip(states, actions, values.tolist()):
+                self.set(state, action, value)
+
+        def maxBatch(self, states):
+            return np.array([self.max(state) for state in states])
+
+        def evict(self, number=None):
+            live = np.flatnonzero(self.keys > QTable.HashedTable.DELETED)
+            score = self.lastUsed[live] if self.policy == 'lru' else self.visits[live]
+            if number is None:
+                number = max(1, int(len(live) * QTable.HashedTable.EVICT_FRACTION))
+            victims = live[np.argpartition(score, number - 1)[:number]]
+            self.keys[victims] = QTable.HashedTable.DELETED
+            self.states[victims] = None
+            self.count -= len(victims)
+
+        def resize(self, maxStates):
+            if maxStates == self.maxStates:
+                return
+            if self.count > maxStates:
+                self.evict(self.count - maxStates)
+            self.maxStates = maxStates
+            self.rehash(QTable.HashedTable.capacityFor(maxStates))
+
+        def rehash(self, capacity):
+            """Reinserts the live states into fresh arrays, clearing the deletion markers"""
+            live = np.flatnonzero(self.keys > QTable.HashedTable.DELETED)
+            keys, states, values = self.keys[live], self.states[live], self.values[live]
+            lastUsed, visits, clock = self.lastUsed[live], self.visits[live], self.clock
+            self.allocate(capacity)
+            self.clock = clock
+            for key, state, row, used, visited in zip(keys.tolist(), states, values, lastUsed, visits):
+                slot = key & self.mask
+                while self.keys[slot] != QTable.HashedTable.EMPTY:
+                    slot = (slot + 1) & self.mask
+                self.keys[slot] = key
+                self.states[slot] = state
+                self.values[slot] = row
+                self.lastUsed[slot] = used
+                self.visits[slot] = visited
+            self.count = self.occupied = len(keys)
+
+        def clear(self):
+            self.allocate(len(self.keys))
@@ -2,8 +2,6 @@ from Agents import modelFreeAgent
 import numpy as np
 from collections import deque
 import random
-import joblib
-import cffi
 import os
 import pathlib
 import platform
@@ -24,6 +22,7 @@ class ReinforceNative(modelFreeAgent.ModelFreeAgent):
         curDir = oldwd / "Agents/Native/reinforceNative"
         os.chdir(curDir.as_posix())
 
+        import cffi
         self.ffi = cffi.FFI()
         if platform.system() == "Windows":
             if not importlib.util.find_spec("Agents.Native.reinforceNative.Release._reinforceNative"):
@@ -0,0 +1,192 @@
+import random
+
+import numpy as np
+
+"""Replay memory for the deep Q agents. Transitions are written into preallocated arrays used as a
+ring buffer, so appending is O(1) and takes no allocation, and a mini-batch is gathered from the
+sampled slots with one fancy-indexed copy per field into batch arrays reused between samples.
+"""
+class ReplayBuffer:
+    def __init__(self, maxlength, batch_size, priorities=None):
+        self.maxlength = maxlength
+        self.batch_size = batch_size
+        # a Priorities to sample in proportion to TD errors, or None to sample uniformly
+        self.priorities = priorities
+        self.size = 0
+        self.position = 0
+        # the slots of the last sample and their importance-sampling weights, None when uniform
+        self.sampledIndices = None
+        self.sampleWeights = None
+        # allocated from the first transition, once the shape and type of states are known
+        self.states = None
+
+    def __len__(self):
+        return self.size
+
+    def allocate(self, state):
+        state = np.asarray(state)
+        # integer states such as uint8 frames keep their type; anything else is stored as float32,
+        # which is what the networks compute in
+        dtype = state.dtype if state.dtype.kind in 'biu' else np.float32
+        shape = state.shape
+        # np.empty only reserves memory; pages are committed as slots are first written
+        self.states = np.empty((self.maxlength,) + shape, dtype=dtype)
+        self.nextStates = np.empty((self.maxlength,) + shape, dtype=dtype)
+        self.actions = np.empty(self.maxlength, dtype=np.int64)
+        self.rewards = np.empty(self.maxlength, dtype=np.float32)
+        self.dones = np.empty(self.maxlength, dtype=bool)
+        self.batchStates = np.empty((self.batch_size,) + shape, dtype=dtype)
+        self.batchNextStates = np.empty((self.batch_size,) + shape, dtype=dtype)
+        self.batchActions = np.empty(self.batch_size, dtype=np.int64)
+        self.batchRewards = np.empty(self.batch_size, dtype=np.float32)
+        self.batchDones = np.empty(self.batch_size, dtype=bool)
+
+    def append(self, state, action, reward, next_state, done):
+        if self.states is None:
+            self.allocate(state)
+        ind = self.position
+        self.states[ind] = state
+        self.actions[ind] = action
+        self.rewards[ind] = reward
+        self.nextStates[ind] = next_state
+        self.dones[ind] = done
+        if self.priorities:
+            self.priorities.add(ind)
+        self.position = (ind + 1) % self.maxlength
+        self.size = min(self.size + 1, self.maxlength)
+
+    def appendBatch(self, states, actions, rewards, next_states, dones):
+        """Appends the lockstep transitions of a vectorized environment in one write per field"""
+        if self.states is None:
+            self.allocate(states[0])
+        count = len(actions)
+        inds = (self.position + np.arange(count)) % self.maxlength
+        if count > self.maxlength:
+            # only the newest transitions fit
+            inds, count = inds[-self.maxlength:], self.maxlength
+            states, actions, rewards = states[-count:], actions[-count:], rewards[-count:]
+            next_states, dones = next_states[-count:], dones[-count:]
+        self.states[inds] = states
+        self.actions[inds] = actions
+        self.rewards[inds] = rewards
+        self.nextStates[inds] = next_states
+        self.dones[inds] = dones
+        if self.priorities:
+            self.priorities.add(inds)
+        self.position = int(inds[-1] + 1) % self.maxlength
+        self.size = min(self.size + count, self.maxlength)
+
+    def sampleIndices(self, batch_size):
+        if self.priorities:
+            self.sampledIndices, self.sampleWeights = self.priorities.sample(batch_size, self.size)
+            return self.sampledIndices
+        # random.sample draws from a range without building it, in O(batch_size)
+        return np.fromiter(random.sample(range(self.size), batch_size), dtype=np.intp, count=batch_size)
+
+    def gather(self, inds):
+        """Copies the given slots into the batch arrays, which are overwritten by the next gather"""
+        if len(inds) != self.batch_size:
+            return self.states[inds], self.actions[inds], self.rewards[inds], self.nextStates[inds], self.dones[inds]
+        np.take(self.states, inds, axis=0, out=self.batchStates)
+        np.take(self.actions, inds, out=self.batchActions)
+        np.take(self.rewards, inds, out=self.batchRewards)
+        np.take(self.nextStates, inds, axis=0, out=self.batchNextStates)
+        np.take(self.dones, inds, out=self.batchDones)
+        return self.batchStates, self.batchActions, self.batchRewards, self.batchNextStates, self.batchDones
+
+    def sample(self, batch_size):
+        """Draws batch_size transitions, distinct and uniformly unless prioritized, as (states, actions, rewards, next states, dones) arrays"""
+        return self.gather(self.sampleIndices(batch_size))
+
+    def updatePriorities(self, indices, errors):
+        """Sets the priorities of sampled transitions from their TD errors"""
+        self.priorities.update(indices, errors)
+
+    def clear(self):
+        self.size = 0
+        self.position = 0
+        if self.priorities:
+            self.priorities.clear()
+
+
+class SumTree:
+    """A complete binary tree in an array whose leaves hold non-negative priorities and whose inner
+    nodes hold the sum of their children. Node 1 is the root, node i has children 2i and 2i + 1, and
+    leaf j is node leafStart + j, so updating leaves and finding the leaf a prefix sum falls in both
+    take O(log n), done for a whole batch at once one tree level at a time."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.leafStart = 1
+        while self.leafStart < capacity:
+            self.leafStart *= 2
+        self.depth = self.leafStart.bit_length() - 1
+        self.nodes = np.zeros(2 * self.leafStart)
+
+    def total(self):
+        return self.nodes[1]
+
+    def get(self, inds):
+        return self.nodes[self.leafStart + np.asarray(inds)]
+
+    def update(self, inds, priorities):
+        nodes = self.nodes
+        leaves = self.leafStart + np.asarray(inds)
+        # where an index repeats, the last priority is kept
+        nodes[leaves] = priorities
+        parents = leaves
+        for _ in range(self.depth):
+            parents = np.unique(parents // 2)
+            nodes[parents] = nodes[2 * parents] + nodes[2 * parents + 1]
+
+    def find(self, values):
+        """Returns the leaves whose span of the cumulative priorities contains each value"""
+        nodes = self.nodes
+        values = np.array(values, dtype=float)
+        inds = np.ones(len(values), dtype=np.intp)
+        for _ in range(self.depth):
+            inds *= 2
+            left = nodes[inds]
+            right = values >= left
+            values -= np.where(right, left, 0)
+            inds += right
+        return inds - self.leafStart
+
+    def clear(self):
+        self.nodes.fill(0)
+
+
+class Priorities:
+    """Proportional prioritized replay (Schaul et al., 2016). A transition is drawn with probability
+    proportional to (|TD error| + EPSILON) ** alpha; new transitions get the largest priority seen so
+    they are replayed at least once. The bias this adds is corrected by importance-sampling weights
+    (size * probability) ** -beta, scaled so the largest in a batch is 1."""
+    EPSILON = 1e-6
+
+    def __init__(self, capacity, alpha, beta):
+        self.tree = SumTree(capacity)
+        self.alpha = alpha
+        self.beta = beta
+        self.maxPriority = 1.0
+
+    def add(self, inds):
+        self.tree.update(np.atleast_1d(inds), self.maxPriority)
+
+    def sample(self, batch_size, size):
+        """Draws one slot from each of batch_size equal spans of the total priority, returning the
+        slots and their importance-sampling weights"""
+        total = self.tree.total()
+        values = (np.arange(batch_size) + np.random.uniform(size=batch_size)) * (total / batch_size)
+        # rounding can carry a value past the last filled slot
+        inds = np.minimum(self.tree.find(np.minimum(values, total * (1 - 1e-12))), size - 1)
+        probabilities = self.tree.get(inds) / total
+        weights = (size * np.maximum(probabilities, 1e-12)) ** -self.beta
+        return inds, weights / weights.max()
+
+    def update(self, inds, errors):
+        priorities = (np.abs(errors) + Priorities.EPSILON) ** self.alpha
+        self.tree.update(inds, priorities)
+        self.maxPriority = max(self.maxPriority, float(priorities.max()))
+
+    def clear(self):
+        self.tree.clear()
+        self.maxPriority = 1.0
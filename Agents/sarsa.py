@@ -1,8 +1,9 @@
-from Agents import qTable
+from Agents import qTable, tabularKernel
 
 
 class sarsa(qTable.QTable):
     displayName = 'SARSA'
+    kernelUpdate = tabularKernel.SARSA
 
     def __init__(self, *args):
         super().__init__(*args)
@@ -20,7 +21,7 @@ class sarsa(qTable.QTable):
             else:
                 target = reward + self.gamma * newQValue
             loss = target - prevQValue
-            self.qtable[(self.last_state, self.last_action)] = prevQValue + self.alpha * loss
+            self.setQvalue(self.last_state, self.last_action, prevQValue + self.alpha * loss)
 
         if done:
             self.last_state = None
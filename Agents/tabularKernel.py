@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+
+"""An optional fast path for tabular Q-learning and SARSA that runs whole episodes, environment
+included, inside one numba-compiled loop updating the agent's dense Q array in place. It is used
+when numba is installed, the agent's table is dense and the environment describes its dynamics
+through Environment.kernel; otherwise training goes through the Model's usual loop. Nothing is
+rendered, and the first call pays a few seconds of compilation.
+"""
+# the update rules an agent can declare in its kernelUpdate attribute
+Q_LEARNING = 0
+SARSA = 1
+
+_numba = None
+_compiled = {}
+
+
+def loadNumba():
+    global _numba
+    if _numba is None:
+        try:
+            import numba
+            _numba = numba
+        except ImportError:
+            _numba = False
+    return _numba
+
+
+def compile(function):
+    if function not in _compiled:
+        _compiled[function] = loadNumba().njit(function)
+    return _compiled[function]
+
+
+def supports(agent, environment):
+    from Agents import qTable
+    return getattr(agent, 'kernelUpdate', None) is not None and isinstance(agent.qtable, qTable.QTable.DenseTable) \
+        and environment.kernel() is not None and bool(loadNumba())
+
+
+class Trainer:
+    def __init__(self, agent, environment):
+        reset, step, self.data = environment.kernel()
+        self.agent = agent
+        # a view, so the agent's table is what gets trained
+        self.q = agent.qtable.values.reshape(-1, agent.action_size)
+        self.reset = compile(reset)
+        self.step = compile(step)
+        self.runEpisodes = compile(runEpisodes)
+
+    def run(self, firstEpisode, episodes, max_steps):
+        """Trains for a number of episodes, returning the reward, steps, mean squared TD error and epsilon of each"""
+        agent = self.agent
+        rewards, steps, losses, epsilons = np.zeros(episodes), np.zeros(episodes, dtype=np.int64), np.zeros(episodes), np.zeros(episodes)
+        self.runEpisodes(self.reset, self.step, self.data, self.q, agent.kernelUpdate, firstEpisode, episodes,
+                         int(max_steps), float(agent.alpha), float(agent.gamma), float(agent.min_epsilon),
+                         float(agent.max_epsilon), float(agent.decay_rate), random.randrange(2**31),
+                         rewards, steps, losses, epsilons)
+        return rewards, steps, losses, epsilons
+
+
+def runEpisodes(reset, step, data, q, rule, firstEpisode, episodes, max_steps, alpha, gamma, min_epsilon, max_epsilon,
+                decay_rate, seed, rewards, steps, losses, epsilons):
+    np.random.seed(seed)
+    envState = np.zeros(16)
+    for ind in range(episodes):
+        episode = firstEpisode + ind
+        # the same schedule as Model.trainSingle, which decays epsilon after each episode
+        epsilon = max_epsilon
+        if episode > 0:
+            epsilon = min_epsilon + (max_epsilon - min_epsilon) * np.exp(-decay_rate * (episode - 1))
+        state = reset(data, envState)
+        action = np.random.randint(q.shape[1]) if np.random.random() < epsilon else np.argmax(q[state])
+        total = 0.0
+        squaredErrors = 0.0
+        count = 0
+        for count in range(1, max_steps + 1):
+            newState, reward, done = step(data, envState, state, action)
+            newAction = np.random.randint(q.shape[1]) if np.random.random() < epsilon else np.argmax(q[newState])
+            target = reward
+            if not done:
+                if rule == SARSA:
+                    target += gamma * q[newState, newAction]
+                else:
+                    target += gamma * np.max(q[newState])
+            error = target - q[state, action]
+            q[state, action] += alpha * error
+            total += reward
+            squaredErrors += error * error
+            state, action = newState, newAction
+            if done:
+                break
+        rewards[ind] = total
+        steps[ind] = count
+        losses[ind] = squaredErrors / max(count, 1)
+        epsilons[ind] = epsilon
@@ -0,0 +1,161 @@
+import math
+
+import numpy as np
+
+from Agents import modelFreeAgent
+
+
+class TileCoding(modelFreeAgent.ModelFreeAgent):
+    """Q-learning with a linear Q-function over hashed tile-coding features. The state is covered by
+    several grids of tiles, each offset from the others by a fraction of a tile, and the tiles it falls
+    in are hashed into a table of weights with a column per action. Q(state, action) is the sum of the
+    weights of those tiles. Everything is NumPy, so it neither needs nor imports TensorFlow."""
+    displayName = 'Tile Coding'
+    newParameters = [modelFreeAgent.ModelFreeAgent.Parameter('Alpha', 0.00, 1.00, 0.01, 0.1, True, True, "The learning rate, shared between the tilings"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Tilings', 1, 64, 1, 8, True, True, "The number of offset grids covering the state space"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Tiles', 1, 64, 1, 8, True, True, "The number of tiles across each state component in one grid"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Table Size', 64, 2**24, 1, 2**16, False, True, "The number of weight rows tiles are hashed into"),
+                     modelFreeAgent.ModelFreeAgent.Parameter('Lambda', 0.00, 1.00, 0.01, 0.0, True, True, "The eligibility trace decay; 0 updates only the last state")]
+    parameters = modelFreeAgent.ModelFreeAgent.parameters + newParameters
+
+    supportsVectorEnv = True
+
+    # traces smaller than this are dropped
+    TRACE_CUTOFF = 0.01
+    MAX_TRACE_LENGTH = 200
+
+    def __init__(self, *args):
+        paramLen = len(TileCoding.newParameters)
+        super().__init__(*args[:-paramLen])
+        self.alpha, self.tilings, self.tiles, self.tableSize, self.lam = args[-paramLen:]
+        self.tilings, self.tiles, self.tableSize = int(self.tilings), int(self.tiles), int(self.tableSize)
+        dimensions = int(np.prod(self.state_size))
+
+        self.low = np.zeros(dimensions)
+        self.scale = np.full(dimensions, float(self.tiles))
+        # tiling t is displaced by t * (1, 3, 5, ...) / tilings of a tile, which spreads the
+        # tilings more evenly than shifting every component by the same amount
+        self.offsets = np.outer(np.arange(self.tilings), 2 * np.arange(dimensions) + 1) / self.tilings % 1
+        random = np.random.RandomState(0)
+        self.hashMultipliers = random.randint(1, 2**31, size=dimensions).astype(np.int64)
+        self.tilingHashes = random.randint(0, 2**31, size=self.tilings).astype(np.int64)
+        self.weights = np.zeros((self.tableSize, self.action_size))
+        self.stepSize = self.alpha / self.tilings
+
+        self.traceDecay = self.gamma * self.lam
+        if self.traceDecay > 0:
+            length = math.ceil(math.log(TileCoding.TRACE_CUTOFF) / math.log(self.traceDecay)) if self.traceDecay < 1 \
+                else TileCoding.MAX_TRACE_LENGTH
+            self.traceLength = max(1, min(length, TileCoding.MAX_TRACE_LENGTH))
+            self.clearTraces()
+            # traces follow a single trajectory
+            self.supportsVectorEnv = False
+        self.lastState = None
+        self.lastFeatures = None
+
+    def setStateBounds(self, stateBounds):
+        low, high = (np.asarray(bound, dtype=float).ravel() for bound in stateBounds)
+        self.low = low
+        self.scale = self.tiles / np.maximum(high - low, 1e-8)
+
+    def features(self, states):
+        """Returns the table rows of the tiles each of a batch of states falls in, shape (batch, tilings)"""
+        scaled = (np.asarray(states, dtype=float).reshape(len(states), -1) - self.low) * self.scale
+        coordinates = np.floor(scaled[:, None, :] + self.offsets).astype(np.int64)
+        return (coordinates @ self.hashMultipliers + self.tilingHashes) % self.tableSize
+
+    def stateFeatures(self, state):
+        # choose_action and the following remember usually see the same state object
+        if state is not self.lastState:
+            self.lastState = state
+            self.lastFeatures = self.features([state])[0]
+        return self.lastFeatures
+
+    def qValues(self, features):
+        return self.weights[features].sum(axis=-2)
+
+    def choose_action(self, state):
+        return int(self.qValues(self.stateFeatures(state)).argmax())
+
+    def choose_actions(self, states):
+        return self.qValues(self.features(states)).argmax(axis=1).tolist()
+
+    def remember(self, state, action, reward, new_state, done=False):
+        features = self.stateFeatures(state)
+        q = self.qValues(features)
+        target = reward
+        if not done:
+            target += self.gamma * self.qValues(self.stateFeatures(new_state)).max()
+        error = target - q[action]
+        if self.traceDecay > 0:
+            self.updateTraces(features, action, error, greedy=q[action] >= q.max())
+            if done:
+                self.clearTraces()
+        else:
+            # a state's tiles are in different tilings, so they almost never share a row
+            self.weights[features, action] += self.stepSize * error
+        return error ** 2
+
+    def remember_batch(self, states, actions, rewards, new_states, dones):
+        if self.traceDecay > 0:
+            return super().remember_batch(states, actions, rewards, new_states, dones)
+        features = self.features(states)
+        actions = np.asarray(actions)
+        q = self.qValues(features)[np.arange(len(actions)), actions]
+        targets = np.asarray(rewards, dtype=float) + np.where(dones, 0, self.gamma * self.qValues(self.features(new_states)).max(axis=1))
+        errors = targets - q
+        # copies can share tiles, so the updates are accumulated
+        np.add.at(self.weights, (features, actions[:, None]), self.stepSize * errors[:, None])
+        return (errors ** 2).tolist()
+
+    def updateTraces(self, features, action, error, greedy):
+        """Watkins's Q(lambda) with accumulating traces, kept as the features of the last few steps and
+        their decayed weights rather than a trace per table entry"""
+        if greedy:
+            self.traceScales *= self.traceDecay
+        else:
+            # the return after an exploratory action says nothing about the greedy policy's earlier
+            # choices, so its error only updates the action taken
+            self.clearTraces()
+        self.traceFeatures[self.tracePosition] = features
+        self.traceActions[self.tracePosition] = action
+        self.traceScales[self.tracePosition] = 1
+        self.tracePosition = (self.tracePosition + 1) % self.traceLength
+        np.add.at(self.weights, (self.traceFeatures, self.traceActions[:, None]),
+                  (self.stepSize * error) * self.traceScales[:, None])
+
+    def clearTraces(self):
+        self.traceFeatures = np.zeros((self.traceLength, self.tilings), dtype=np.int64)
+        self.traceActions = np.zeros(self.traceLength, dtype=np.int64)
+        self.traceScales = np.zeros(self.traceLength)
+        self.tracePosition = 0
+
+    def save(self, filename):
+        import joblib
+        joblib.dump((self.displayName, self.weights), filename)
+
+    def load(self, filename):
+        import joblib
+        name, mem = joblib.load(filename)
+        if name != self.displayName:
+            print('load failed')
+        else:
+            self.memload(mem)
+            print('load successful')
+
+    def memsave(self):
+        return self.weights
+
+    def memload(self, mem):
+        if mem.shape == self.weights.shape:
+            self.weights = mem
+        self.lastState = None
+
+    def reset(self):
+        self.weights.fill(0)
+        if self.traceDecay > 0:
+            self.clearTraces()
+        self.lastState = None
+
+    def __deepcopy__(self, memodict={}):
+        pass
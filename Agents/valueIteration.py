@@ -1,16 +1,97 @@
+import heapq
+
+import numpy as np
+
 from Agents import modelBasedAgent
 
 
 class ValueIteration(modelBasedAgent.ModelBasedAgent):
-    def __init__(self):
-        super().__init__()
-        self.value = []
+    displayName = 'Value Iteration'
+    newParameters = [modelBasedAgent.ModelBasedAgent.Parameter('Sweep Order', 0, 2, 1, 0, True, True, "0 backs up every state from the previous sweep's values, 1 updates the values in place state by state (Gauss-Seidel), 2 backs up the states with the largest Bellman errors first (prioritized sweeping)")]
+    parameters = modelBasedAgent.ModelBasedAgent.parameters + newParameters
+
+    SYNCHRONOUS, IN_PLACE, PRIORITIZED = range(3)
+
+    def __init__(self, *args):
+        paramLen = len(ValueIteration.newParameters)
+        super().__init__(*args[:-paramLen])
+        (self.sweepOrder,) = [int(arg) for arg in args[-paramLen:]]
+
+    def solve(self):
+        if self.sweepOrder == ValueIteration.IN_PLACE:
+            backups = self.solveInPlace()
+        elif self.sweepOrder == ValueIteration.PRIORITIZED:
+            backups = self.solvePrioritized()
+        else:
+            backups = self.solveSynchronous()
+        self.policy = self.mdp.qValues(self.values, self.gamma).argmax(axis=1)
+        return backups
+
+    def solveSynchronous(self):
+        # every state is backed up from the previous sweep's values
+        for sweep in range(1, self.maxIterations + 1):
+            values = self.mdp.qValues(self.values, self.gamma).max(axis=1)
+            delta = abs(values - self.values).max()
+            self.values = values
+            if delta <= self.tolerance:
+                break
+        return sweep * self.mdp.numStates
+
+    def solveInPlace(self):
+        # later states in a sweep already see the values updated earlier in it
+        values = self.values.astype(float)
+        for sweep in range(1, self.maxIterations + 1):
+            delta = 0
+            for state in range(self.mdp.numStates):
+                value = self.mdp.stateQValues(state, values, self.gamma).max()
+                delta = max(delta, abs(value - values[state]))
+                values[state] = value
+            if delta <= self.tolerance:
+                break
+        self.values = values
+        return sweep * self.mdp.numStates
+
+    def solvePrioritized(self):
+        """Backs up states in order of a bound on their Bellman error. After a state is backed up its error
+        is 0; a change of d in a successor's value can then change Q(state, action) by at most
+        gamma * P(successor | state, action) * d, and those amounts are accumulated per action. Planning
+        stops when no state's bound exceeds the tolerance, so every remaining error is within it.
 
-    def update(self):
-        super().update()
+        A state is only queued again once its bound has more than doubled since it was last queued,
+        which keeps the heap small at the cost of backing states up in a roughly sorted order."""
+        mdp = self.mdp
+        numActions = mdp.numActions
+        values = self.values.astype(float)
+        errors = abs(mdp.qValues(values, self.gamma).max(axis=1) - values)
+        bounds = np.zeros((mdp.numStates, numActions))
+        # the priority each state was last queued with, 0 while it is not queued
+        queued = [error if error > self.tolerance else 0 for error in errors.tolist()]
+        queue = [(-error, state) for state, error in enumerate(queued) if error]
+        heapq.heapify(queue)
+        backups = 0
+        while queue and backups < self.maxIterations * mdp.numStates:
+            priority, state = heapq.heappop(queue)
+            if queued[state] != -priority:
+                continue
+            queued[state] = 0
+            value = mdp.stateQValues(state, values, self.gamma).max()
+            delta = abs(value - values[state])
+            values[state] = value
+            bounds[state] = 0
+            backups += 1
 
-    def choose_action(self, state):
-        super().choose_action(state)
+            rows, probabilities = mdp.predecessors(state)
+            if not len(rows) or delta == 0:
+                continue
+            # each (state, action) row leads to a given state at most once, so rows has no repeats
+            bounds.ravel()[rows] += self.gamma * probabilities * delta
+            changed = rows // numActions
+            for changedState, bound in zip(changed.tolist(), bounds[changed].max(axis=1).tolist()):
+                if bound > self.tolerance and bound > 2 * queued[changedState]:
+                    queued[changedState] = bound
+                    heapq.heappush(queue, (-bound, changedState))
+        self.values = values
+        return backups
 
     def __deepcopy__(self, memodict={}):
         pass
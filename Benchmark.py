@@ -0,0 +1,4 @@
+from MVC import benchmark
+import sys
+
+benchmark.main(sys.argv)
@@ -6,6 +6,7 @@ from Agents.episodicExperienceBuffer import EpisodicExperienceBuffer
 
 class CustomAgent(DeepQ):
     displayName = 'Deep SARSA'
+    supportsVectorEnv = False
 
     def __init__(self, *args):
         super().__init__(*args)
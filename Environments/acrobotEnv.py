@@ -1,6 +1,4 @@
 from Environments import classicControlEnv
-import gym
-from PIL import Image, ImageDraw
 from math import cos, sin, pi
 import numpy as np
 
@@ -8,9 +6,11 @@ class AcrobotEnv(classicControlEnv.ClassicControlEnv):
     displayName = 'Acrobot'
 
     def __init__(self):
+        import gym
         self.env = gym.make('Acrobot-v1')
         self.action_size = self.env.action_space.n
         self.state_size = self.env.observation_space.shape
+        self.stateBounds = (self.env.observation_space.low, self.env.observation_space.high)
 
     def boundToScreen(self, x, y):
         bound = 2.2
@@ -21,6 +21,7 @@ class AcrobotEnv(classicControlEnv.ClassicControlEnv):
         return tx + x * cos(-ang) + y * sin(-ang), ty - x * sin(-ang) + y * cos(-ang)
 
     def render(self):
+        from PIL import Image, ImageDraw
         if self.env.state is None: return None
 
         screen_width = 500
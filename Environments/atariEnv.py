@@ -1,7 +1,4 @@
 from Environments import environment
-import gym
-from PIL import Image
-import cv2
 import numpy as np
 from abc import ABC
 import random
@@ -34,13 +31,21 @@ class AtariEnv(environment.Environment, ABC):
     def sample_action(self):
         return self.env.action_space.sample()
 
+    @staticmethod
+    def make(name):
+        # gym and atari-py are only imported once an Atari game is actually created
+        import gym
+        return gym.make(name)
+
     def preprocess(self, image):
+        import cv2
         self.rawImg = image
         image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
         image = cv2.resize(image, (self.image_width, self.image_height), interpolation=cv2.INTER_AREA)
         return np.reshape(image, self.state_size)
 
     def render(self, mode='RGB'):
+        from PIL import Image
         return Image.fromarray(self.rawImg.astype('uint8'), 'RGB')
 
 
@@ -49,7 +54,7 @@ class adventureEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Adventure-v0')
+        self.env = self.make('Adventure-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -61,7 +66,7 @@ class air_raidEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('AirRaid-v0')
+        self.env = self.make('AirRaid-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -73,7 +78,7 @@ class alienEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Alien-v0')
+        self.env = self.make('Alien-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -85,7 +90,7 @@ class amidarEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Amidar-v0')
+        self.env = self.make('Amidar-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -97,7 +102,7 @@ class assaultEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Assault-v0')
+        self.env = self.make('Assault-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -109,7 +114,7 @@ class asterixEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Asterix-v0')
+        self.env = self.make('Asterix-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -121,7 +126,7 @@ class asteroidsEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Asteroids-v0')
+        self.env = self.make('Asteroids-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -133,7 +138,7 @@ class atlantisEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Atlantis-v0')
+        self.env = self.make('Atlantis-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -145,7 +150,7 @@ class bank_heistEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('BankHeist-v0')
+        self.env = self.make('BankHeist-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -157,7 +162,7 @@ class battle_zoneEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('BattleZone-v0')
+        self.env = self.make('BattleZone-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -169,7 +174,7 @@ class beam_riderEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('BeamRider-v0')
+        self.env = self.make('BeamRider-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -181,7 +186,7 @@ class berzerkEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Berzerk-v0')
+        self.env = self.make('Berzerk-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -193,7 +198,7 @@ class bowlingEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Bowling-v0')
+        self.env = self.make('Bowling-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -205,7 +210,7 @@ class boxingEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Boxing-v0')
+        self.env = self.make('Boxing-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -217,7 +222,7 @@ class breakoutEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Breakout-v0')
+        self.env = self.make('Breakout-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -229,7 +234,7 @@ class carnivalEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Carnival-v0')
+        self.env = self.make('Carnival-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -241,7 +246,7 @@ class centipedeEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Centipede-v0')
+        self.env = self.make('Centipede-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -253,7 +258,7 @@ class chopper_commandEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('ChopperCommand-v0')
+        self.env = self.make('ChopperCommand-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -265,7 +270,7 @@ class crazy_climberEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('CrazyClimber-v0')
+        self.env = self.make('CrazyClimber-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -277,7 +282,7 @@ class demon_attackEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('DemonAttack-v0')
+        self.env = self.make('DemonAttack-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -289,7 +294,7 @@ class double_dunkEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('DoubleDunk-v0')
+        self.env = self.make('DoubleDunk-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -301,7 +306,7 @@ class elevator_actionEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('ElevatorAction-v0')
+        self.env = self.make('ElevatorAction-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -313,7 +318,7 @@ class enduroEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Enduro-v0')
+        self.env = self.make('Enduro-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -325,7 +330,7 @@ class fishing_derbyEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('FishingDerby-v0')
+        self.env = self.make('FishingDerby-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -337,7 +342,7 @@ class freewayEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Freeway-v0')
+        self.env = self.make('Freeway-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -349,7 +354,7 @@ class frostbiteEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Frostbite-v0')
+        self.env = self.make('Frostbite-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -361,7 +366,7 @@ class gopherEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Gopher-v0')
+        self.env = self.make('Gopher-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -373,7 +378,7 @@ class gravitarEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Gravitar-v0')
+        self.env = self.make('Gravitar-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -385,7 +390,7 @@ class heroEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Hero-v0')
+        self.env = self.make('Hero-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -397,7 +402,7 @@ class ice_hockeyEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('IceHockey-v0')
+        self.env = self.make('IceHockey-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -409,7 +414,7 @@ class jamesbondEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Jamesbond-v0')
+        self.env = self.make('Jamesbond-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -421,7 +426,7 @@ class journey_escapeEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('JourneyEscape-v0')
+        self.env = self.make('JourneyEscape-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -433,7 +438,7 @@ class kangarooEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Kangaroo-v0')
+        self.env = self.make('Kangaroo-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -445,7 +450,7 @@ class krullEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Krull-v0')
+        self.env = self.make('Krull-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -457,7 +462,7 @@ class kung_fu_masterEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('KungFuMaster-v0')
+        self.env = self.make('KungFuMaster-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -469,7 +474,7 @@ class montezuma_revengeEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('MontezumaRevenge-v0')
+        self.env = self.make('MontezumaRevenge-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -481,7 +486,7 @@ class ms_pacmanEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('MsPacman-v0')
+        self.env = self.make('MsPacman-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -493,7 +498,7 @@ class name_this_gameEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('NameThisGame-v0')
+        self.env = self.make('NameThisGame-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -505,7 +510,7 @@ class phoenixEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Phoenix-v0')
+        self.env = self.make('Phoenix-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -517,7 +522,7 @@ class pitfallEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Pitfall-v0')
+        self.env = self.make('Pitfall-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -529,7 +534,7 @@ class pongEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Pong-v0')
+        self.env = self.make('Pong-v0')
         self.action_size = 2
 
     def step(self, action):
@@ -550,7 +555,7 @@ class pooyanEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Pooyan-v0')
+        self.env = self.make('Pooyan-v0')
         self.action_size = self.env.action_space.n
 
 0
@@ -562,7 +567,7 @@ class private_eyeEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('PrivateEye-v0')
+        self.env = self.make('PrivateEye-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -574,7 +579,7 @@ class qbertEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Qbert-v0')
+        self.env = self.make('Qbert-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -586,7 +591,7 @@ class riverraidEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Riverraid-v0')
+        self.env = self.make('Riverraid-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -598,7 +603,7 @@ class road_runnerEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('RoadRunner-v0')
+        self.env = self.make('RoadRunner-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -610,7 +615,7 @@ class robotankEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Robotank-v0')
+        self.env = self.make('Robotank-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -622,7 +627,7 @@ class seaquestEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Seaquest-v0')
+        self.env = self.make('Seaquest-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -634,7 +639,7 @@ class skiingEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Skiing-v0')
+        self.env = self.make('Skiing-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -646,7 +651,7 @@ class solarisEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Solaris-v0')
+        self.env = self.make('Solaris-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -658,7 +663,7 @@ class space_invadersEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('SpaceInvaders-v0')
+        self.env = self.make('SpaceInvaders-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -670,7 +675,7 @@ class star_gunnerEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('StarGunner-v0')
+        self.env = self.make('StarGunner-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -682,7 +687,7 @@ class tennisEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Tennis-v0')
+        self.env = self.make('Tennis-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -694,7 +699,7 @@ class time_pilotEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('TimePilot-v0')
+        self.env = self.make('TimePilot-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -706,7 +711,7 @@ class tutankhamEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Tutankham-v0')
+        self.env = self.make('Tutankham-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -718,7 +723,7 @@ class up_n_downEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('UpNDown-v0')
+        self.env = self.make('UpNDown-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -730,7 +735,7 @@ class ventureEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Venture-v0')
+        self.env = self.make('Venture-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -742,7 +747,7 @@ class video_pinballEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('VideoPinball-v0')
+        self.env = self.make('VideoPinball-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -754,7 +759,7 @@ class wizard_of_worEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('WizardOfWor-v0')
+        self.env = self.make('WizardOfWor-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -766,7 +771,7 @@ class yars_revengeEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('YarsRevenge-v0')
+        self.env = self.make('YarsRevenge-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -778,7 +783,7 @@ class zaxxonEnv(AtariEnv):
 
     def __init__(self):
         super().__init__()
-        self.env = gym.make('Zaxxon-v0')
+        self.env = self.make('Zaxxon-v0')
         self.action_size = self.env.action_space.n
 
 
@@ -1,17 +1,19 @@
 from Environments import classicControlEnv
-import gym
-from PIL import Image, ImageDraw
 import math
 
 class CartPoleEnv(classicControlEnv.ClassicControlEnv):
     displayName = 'Cart Pole'
 
     def __init__(self):
+        import gym
         self.env = gym.make('CartPole-v1')
         self.action_size = self.env.action_space.n
         self.state_size = self.env.observation_space.shape
+        # the velocities are unbounded in the observation space; these cover almost every episode
+        self.stateBounds = ((-2.4, -3.0, -0.21, -3.5), (2.4, 3.0, 0.21, 3.5))
 
     def render(self):
+        from PIL import Image, ImageDraw
         if self.env.state is None: return None
 
         screen_width = 600
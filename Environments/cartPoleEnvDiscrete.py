@@ -1,6 +1,6 @@
 from Environments import cartPoleEnv
-from PIL import Image, ImageDraw
 import math
+import numpy as np
 
 class CartPoleEnvDiscrete(cartPoleEnv.CartPoleEnv):
     displayName = 'Cart Pole Discrete'
@@ -15,6 +15,8 @@ class CartPoleEnvDiscrete(cartPoleEnv.CartPoleEnv):
         self.pole_angle_range = (-2, 2)
         self.cart_velocity_range = (-1, 1)
         self.angle_rate_range = (-3.5, 3.5)
+        self.stateBins = (self.n_bins, self.n_bins, self.n_bins_angle, self.n_bins)
+        self.stateBounds = ((0, 0, 0, 0), self.stateBins)
 
     def step(self, action):
         reward = super().step(action)
@@ -22,6 +24,7 @@ class CartPoleEnvDiscrete(cartPoleEnv.CartPoleEnv):
         return reward
 
     def render(self):
+        from PIL import Image, ImageDraw
         if self.env.state is None: return None
 
         screen_width = 600
@@ -82,3 +85,48 @@ class CartPoleEnvDiscrete(cartPoleEnv.CartPoleEnv):
         state = new_cart_position, new_cart_velocity, new_pole_angle, new_angle_rate_of_change
 
         return state
+
+    def kernel(self):
+        env = self.env.unwrapped
+        physics = np.array([env.gravity, env.masscart, env.masspole, env.length, env.force_mag, env.tau,
+                            env.x_threshold, env.theta_threshold_radians])
+        ranges = np.array([self.cart_position_range, self.cart_velocity_range, self.pole_angle_range,
+                           self.angle_rate_range], dtype=np.float64)
+        return kernelReset, kernelStep, (physics, ranges, np.array(self.stateBins, dtype=np.int64))
+
+
+
+def kernelReset(data, envState):
+    ranges, bins = data[1], data[2]
+    index = 0
+    for ind in range(4):
+        envState[ind] = np.random.uniform(-0.05, 0.05)
+        # the same binning as to_bin; the compiled functions cannot call other Python functions
+        bin = int(np.floor((envState[ind] - ranges[ind, 0]) / ((ranges[ind, 1] - ranges[ind, 0]) / bins[ind])))
+        index = index * bins[ind] + max(min(bin, bins[ind] - 1), 0)
+    return index
+
+
+def kernelStep(data, envState, state, action):
+    # the same Euler integration as gym's CartPoleEnv.step
+    physics, ranges, bins = data
+    gravity, masscart, masspole, length, force_mag, tau, x_threshold, theta_threshold = physics
+    x, x_dot, theta, theta_dot = envState[0], envState[1], envState[2], envState[3]
+    force = force_mag if action == 1 else -force_mag
+    total_mass = masspole + masscart
+    polemass_length = masspole * length
+    costheta, sintheta = math.cos(theta), math.sin(theta)
+    temp = (force + polemass_length * theta_dot * theta_dot * sintheta) / total_mass
+    thetaacc = (gravity * sintheta - costheta * temp) / (length * (4.0 / 3.0 - masspole * costheta * costheta / total_mass))
+    xacc = temp - polemass_length * thetaacc * costheta / total_mass
+    envState[0] = x + tau * x_dot
+    envState[1] = x_dot + tau * xacc
+    envState[2] = theta + tau * theta_dot
+    envState[3] = theta_dot + tau * thetaacc
+    done = abs(envState[0]) > x_threshold or abs(envState[2]) > theta_threshold
+
+    index = 0
+    for ind in range(4):
+        bin = int(np.floor((envState[ind] - ranges[ind, 0]) / ((ranges[ind, 1] - ranges[ind, 0]) / bins[ind])))
+        index = index * bins[ind] + max(min(bin, bins[ind] - 1), 0)
+    return index, 1.0, done
@@ -1,4 +1,3 @@
-import gym
 from abc import ABC
 
 """This is an abstract environment class that allows a user to define
@@ -7,6 +6,17 @@ their own custom environment by extending this class as a 'CustomEnv' class.
 class Environment(ABC):
     displayName = 'Environment'
 
+    # the number of values each state component can take, for environments whose states are tuples
+    # of integers in range(stateBins[i]); None when the state space is not enumerable
+    stateBins = None
+    # (low, high), the range each state component usually lies in, for agents that need to scale
+    # states; None when unknown
+    stateBounds = None
+    # the full transition model in gym's format, transitions[state][action] being a list of
+    # (probability, next state, reward, done) tuples over the states numbered in the row-major
+    # order of stateBins; None when the dynamics are not known
+    transitions = None
+
     """Constructor method
     """
     def __init__(self):
@@ -45,6 +55,18 @@ class Environment(ABC):
         """
         pass
 
+    def kernel(self):
+        """Describes the environment's dynamics as plain numeric functions that Agents.tabularKernel can
+        compile, for environments whose states are enumerated by stateBins. reset(data, envState) starts
+        an episode and returns the state's index in the row-major order of stateBins; step(data, envState,
+        state, action) returns the next state's index, the reward and whether the episode is done.
+        envState is a float array of length 16 the functions may keep their own state in. The functions
+        are compiled with numba, so they cannot call other Python functions.
+        :return: (reset, step, data), data being a tuple of arrays passed to both, or None
+        :rtype: tuple
+        """
+        return None
+
     def close(self):
         """Closes the environment, freeing any resources it is using
         :return: None
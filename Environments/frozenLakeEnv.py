@@ -1,15 +1,16 @@
 from Environments import environment
-import gym
 import sys
-from gym import utils
 
 class FrozenLakeEnv(environment.Environment):
     displayName = 'Frozen Lake'
 
     def __init__(self):
+        import gym
         self.env = gym.make('FrozenLake-v0')
         self.action_size = self.env.action_space.n
         self.state_size = (1,)
+        self.stateBins = (self.env.observation_space.n,)
+        self.transitions = self.env.unwrapped.P
         print(self.env.action_space, self.env.observation_space)
         print(self.action_size, self.state_size)
 
@@ -27,6 +28,11 @@ class FrozenLakeEnv(environment.Environment):
         self.done = False
         self.total_rewards = 0
 
+    def kernel(self):
+        from Environments import tabularDynamics
+        return (tabularDynamics.transitionReset, tabularDynamics.transitionStep,
+                tabularDynamics.transitionData(self.transitions, self.env.unwrapped.isd, self.action_size))
+
     def sample_action(self):
         return self.env.action_space.sample()
 
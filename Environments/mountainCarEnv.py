@@ -1,6 +1,4 @@
 from Environments import classicControlEnv
-import gym
-from PIL import Image, ImageDraw
 from math import cos, sin
 import numpy as np
 
@@ -8,9 +6,11 @@ class MountainCarEnv(classicControlEnv.ClassicControlEnv):
     displayName = 'Mountain Car'
 
     def __init__(self):
+        import gym
         self.env = gym.make('MountainCar-v0')
         self.action_size = self.env.action_space.n
         self.state_size = self.env.observation_space.shape
+        self.stateBounds = (self.env.observation_space.low, self.env.observation_space.high)
 
     def step(self, action):
         return super().step(action) + 0.1*self.state[0]
@@ -22,6 +22,7 @@ class MountainCarEnv(classicControlEnv.ClassicControlEnv):
         return tx + x * cos(-ang) + y * sin(-ang), ty - x * sin(-ang) + y * cos(-ang)
 
     def render(self):
+        from PIL import Image, ImageDraw
         screen_width = 600
         screen_height = 400
 
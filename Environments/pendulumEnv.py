@@ -1,6 +1,5 @@
 from Environments import classicControlEnv
-import gym, random
-from PIL import Image, ImageDraw
+import random
 import numpy as np
 import math
 
@@ -8,6 +7,7 @@ class PendulumEnv(classicControlEnv.ClassicControlEnv):
     displayName = 'Pendulum'
 
     def __init__(self):
+        import gym
         self.env = gym.make('Pendulum-v0')
         self.action_size = 10
         self.action_low = self.env.action_space.low[0]
@@ -15,6 +15,7 @@ class PendulumEnv(classicControlEnv.ClassicControlEnv):
         self.action_range = self.action_high - self.action_low
         self.action_tick = self.action_range/(self.action_size-1)
         self.state_size = self.env.observation_space.shape
+        self.stateBounds = (self.env.observation_space.low, self.env.observation_space.high)
 
     def step(self, action):
         action = [self.action_low + action*self.action_tick]
@@ -24,6 +25,7 @@ class PendulumEnv(classicControlEnv.ClassicControlEnv):
         return random.randrange(self.action_size)
 
     def render(self):
+        from PIL import Image, ImageDraw
         if self.env.state is None: return None
 
         screen_width = 500
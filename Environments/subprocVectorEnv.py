@@ -0,0 +1,203 @@
+import importlib
+import importlib.util
+import multiprocessing
+import random
+import sys
+
+import numpy as np
+
+"""Steps several copies of an environment in a pool of worker processes. Each worker
+owns one or more copies and writes their observations, rewards and done flags into
+shared memory, so the learner reads them without any pickling. It exposes the same
+interface as Environments.vectorEnv.VectorEnv.
+"""
+class SubprocVectorEnv:
+    STEP = 0
+    RESET = 1
+    RENDER = 2
+    CLOSE = 3
+
+    def __init__(self, environment_class, num_envs, num_workers, probe=None):
+        """Constructor method
+        :param environment_class: the environment class to instantiate in the workers
+        :type environment_class: type
+        :param num_envs: the number of copies to run
+        :type num_envs: int
+        :param num_workers: the number of worker processes to spread the copies over
+        :type num_workers: int
+        :param probe: an instance of the environment class used to find the observation layout
+        :type probe: Environments.environment.Environment
+        """
+        if probe is None:
+            probe = environment_class()
+        probe.reset()
+        observation = np.asarray(probe.state)
+        self.stateIsTuple = isinstance(probe.state, tuple)
+        self.num_envs = num_envs
+        self.action_size = probe.action_size
+        self.state_size = probe.state_size
+
+        context = multiprocessing.get_context()
+        shape = (num_envs,) + observation.shape
+        buffers = (
+            (context.RawArray(np.ctypeslib.as_ctypes_type(observation.dtype), int(np.prod(shape))), observation.dtype, shape),
+            (context.RawArray('d', num_envs), np.float64, (num_envs,)),
+            (context.RawArray('b', num_envs), np.bool_, (num_envs,)),
+            (context.RawArray('q', num_envs), np.int64, (num_envs,)),
+            (context.RawArray('q', num_envs), np.int64, (num_envs,)),
+        )
+        self.observations, self.rewards, self.doneFlags, self.actions, self.randomActions = _views(buffers)
+
+        envSpec = classSpec(environment_class)
+        num_workers = max(1, min(num_workers, num_envs))
+        self.owners = []
+        self.connections = []
+        self.processes = []
+        # forked workers would otherwise inherit, and repeat, this process's random streams; drawing the
+        # base seed from them keeps seeded runs reproducible
+        seed = random.randrange(2**31)
+        for worker in range(num_workers):
+            indices = list(range(worker, num_envs, num_workers))
+            parentConn, childConn = context.Pipe()
+            process = context.Process(target=_work, args=(childConn, envSpec, indices, buffers, seed + worker),
+                                      daemon=True)
+            process.start()
+            childConn.close()
+            self.connections.append(parentConn)
+            self.processes.append(process)
+        for index in range(num_envs):
+            self.owners.append(index % num_workers)
+
+    @property
+    def states(self):
+        observations = self.observations.copy()
+        if self.stateIsTuple:
+            return [tuple(observation.tolist()) for observation in observations]
+        return list(observations)
+
+    @property
+    def dones(self):
+        return self.doneFlags.tolist()
+
+    def step(self, actions):
+        self.actions[:] = actions
+        for conn in self.connections:
+            conn.send((SubprocVectorEnv.STEP, None))
+        for conn in self.connections:
+            conn.recv()
+        return self.rewards.tolist()
+
+    def reset(self, index):
+        self.reset_batch([index])
+
+    def reset_batch(self, indices):
+        """Resets several copies with at most one round trip per worker
+        :param indices: the indices of the copies to reset
+        :type indices: list
+        """
+        perWorker = {}
+        for index in indices:
+            perWorker.setdefault(self.owners[index], []).append(index)
+        for worker, workerIndices in perWorker.items():
+            self.connections[worker].send((SubprocVectorEnv.RESET, workerIndices))
+        for worker in perWorker:
+            self.connections[worker].recv()
+
+    def reset_all(self):
+        self.reset_batch(range(self.num_envs))
+
+    def sample_actions(self):
+        # the workers sample the next random action after every step and reset
+        return self.randomActions.tolist()
+
+    def render(self, index=0):
+        conn = self.connections[self.owners[index]]
+        conn.send((SubprocVectorEnv.RENDER, index))
+        return conn.recv()
+
+    def close(self):
+        for conn in self.connections:
+            try:
+                conn.send((SubprocVectorEnv.CLOSE, None))
+                conn.recv()
+            except (BrokenPipeError, EOFError):
+                pass
+            conn.close()
+        for process in self.processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        self.connections = []
+        self.processes = []
+
+
+def supported():
+    # daemonic processes, such as a ModelProcess worker, cannot start processes of their own
+    return not multiprocessing.current_process().daemon
+
+
+def _views(buffers):
+    return [np.frombuffer(raw, dtype=dtype).reshape(shape) for raw, dtype, shape in buffers]
+
+
+def classSpec(cls):
+    """Returns a picklable description of a class that loadClass can turn back into the class
+    in another process. Classes loaded from a file (such as those in 'Custom Environments/' and
+    'Custom Agents/') cannot be imported by name there, so the source file is passed along as well.
+    """
+    path = getattr(sys.modules.get(cls.__module__), '__file__', None)
+    if path is None:
+        # modules loaded with importlib.util.module_from_spec are not registered in sys.modules
+        for attr in vars(cls).values():
+            if hasattr(attr, '__code__'):
+                path = attr.__code__.co_filename
+                break
+    return cls.__module__, cls.__qualname__, path
+
+
+def loadClass(moduleName, className, path):
+    try:
+        module = importlib.import_module(moduleName)
+    except ImportError:
+        spec = importlib.util.spec_from_file_location(moduleName, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return getattr(module, className)
+
+
+def _work(conn, envSpec, indices, buffers, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    observations, rewards, doneFlags, actions, randomActions = _views(buffers)
+    environment_class = loadClass(*envSpec)
+    envs = {index: environment_class() for index in indices}
+
+    def publish(index, env):
+        observations[index] = env.state
+        doneFlags[index] = bool(env.done)
+        randomActions[index] = env.sample_action()
+
+    try:
+        while True:
+            command, arg = conn.recv()
+            if command == SubprocVectorEnv.STEP:
+                for index, env in envs.items():
+                    rewards[index] = env.step(int(actions[index]))
+                    publish(index, env)
+                conn.send(None)
+            elif command == SubprocVectorEnv.RESET:
+                for index in arg:
+                    env = envs[index]
+                    env.reset()
+                    rewards[index] = 0
+                    publish(index, env)
+                conn.send(None)
+            elif command == SubprocVectorEnv.RENDER:
+                conn.send(envs[arg].render())
+            elif command == SubprocVectorEnv.CLOSE:
+                for env in envs.values():
+                    env.close()
+                conn.send(None)
+                break
+    except (KeyboardInterrupt, EOFError):
+        pass
@@ -0,0 +1,46 @@
+import numpy as np
+
+"""Environment dynamics given by a transition table, written as plain numeric functions so that
+Agents.tabularKernel can compile them into its training loop. data is the tuple of arrays built by
+transitionData; the outcomes of (state, action) are the entries starts[row]:starts[row + 1] with
+row = state * numActions + action.
+"""
+def transitionData(transitions, initialDistribution, numActions):
+    """Builds the arrays from gym's transitions[state][action] lists of (probability, next state, reward,
+    done) tuples and the probability of starting in each state"""
+    starts, cumulative, nextStates, rewards, dones = [0], [], [], [], []
+    for state in range(len(transitions)):
+        for action in range(numActions):
+            total = 0.0
+            for probability, nextState, reward, done in transitions[state][action]:
+                total += probability
+                cumulative.append(total)
+                nextStates.append(nextState)
+                rewards.append(reward)
+                dones.append(done)
+            starts.append(len(cumulative))
+    return (np.array(starts, dtype=np.int64), np.array(cumulative, dtype=np.float64),
+            np.array(nextStates, dtype=np.int64), np.array(rewards, dtype=np.float64),
+            np.array(dones, dtype=np.bool_), np.cumsum(np.asarray(initialDistribution, dtype=np.float64)))
+
+
+def transitionReset(data, envState):
+    initial = data[5]
+    draw = np.random.random() * initial[-1]
+    for state in range(len(initial)):
+        if draw < initial[state]:
+            return state
+    return len(initial) - 1
+
+
+def transitionStep(data, envState, state, action):
+    starts, cumulative, nextStates, rewards, dones, initial = data
+    row = state * ((len(starts) - 1) // len(initial)) + action
+    start, end = starts[row], starts[row + 1]
+    draw = np.random.random() * cumulative[end - 1]
+    outcome = end - 1
+    for ind in range(start, end):
+        if draw < cumulative[ind]:
+            outcome = ind
+            break
+    return nextStates[outcome], rewards[outcome], dones[outcome]
@@ -0,0 +1,56 @@
+"""Steps several copies of an environment in lockstep so that an agent can
+select actions for all of them with a single batched call.
+"""
+class VectorEnv:
+    def __init__(self, environment_class, num_envs, first=None):
+        """Constructor method
+        :param environment_class: the environment class to instantiate
+        :type environment_class: type
+        :param num_envs: the number of copies to run
+        :type num_envs: int
+        :param first: an already constructed instance to use as the first copy
+        :type first: Environments.environment.Environment
+        """
+        self.envs = [first or environment_class()]
+        self.envs += [environment_class() for _ in range(num_envs - 1)]
+        self.num_envs = num_envs
+        self.action_size = self.envs[0].action_size
+        self.state_size = self.envs[0].state_size
+
+    @property
+    def states(self):
+        return [env.state for env in self.envs]
+
+    @property
+    def dones(self):
+        return [env.done for env in self.envs]
+
+    def step(self, actions):
+        """Advances every copy by one time step
+        :param actions: one action per copy
+        :type actions: list
+        :return: the reward obtained by each copy
+        :rtype: list
+        """
+        return [env.step(action) for env, action in zip(self.envs, actions)]
+
+    def reset(self, index):
+        self.envs[index].reset()
+
+    def reset_batch(self, indices):
+        for index in indices:
+            self.envs[index].reset()
+
+    def reset_all(self):
+        for env in self.envs:
+            env.reset()
+
+    def sample_actions(self):
+        return [env.sample_action() for env in self.envs]
+
+    def render(self, index=0):
+        return self.envs[index].render()
+
+    def close(self):
+        for env in self.envs:
+            env.close()
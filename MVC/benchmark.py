@@ -0,0 +1,170 @@
+import json
+import multiprocessing
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from Environments import atariEnv
+from MVC.model import Model
+from MVC import registry, controller
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+"""Runs every agent against the classic control environments and a representative Atari game
+for a fixed number of steps and reports throughput. Each case runs in a fresh worker process so
+that its peak memory is its own and a failing agent or missing game does not stop the run.
+
+usage: python Benchmark.py [--steps N] [--timeout SECONDS] [--agents A,B] [--environments X,Y]
+                           [--output results.json]
+"""
+class Benchmark:
+    # the classic control environments and one representative Atari game
+    environments = registry.singleDimEnvs + [atariEnv.breakoutEnv]
+
+    def __init__(self, steps=5000, timeout=600, agentNames=None, environmentNames=None):
+        self.steps = steps
+        self.timeout = timeout
+        self.agentNames = agentNames
+        self.environmentNames = environmentNames
+
+    def cases(self):
+        for agent_class in registry.pythonAgents + registry.nativeAgents:
+            if self.agentNames and agent_class.displayName not in self.agentNames:
+                continue
+            for environment_class in registry.allowedEnvs[agent_class]:
+                if environment_class not in Benchmark.environments:
+                    continue
+                if self.environmentNames and environment_class.displayName not in self.environmentNames:
+                    continue
+                yield agent_class, environment_class
+
+    def run(self):
+        results = []
+        context = multiprocessing.get_context()
+        pool = context.Pool(1, maxtasksperchild=1)
+        try:
+            for agent_class, environment_class in self.cases():
+                try:
+                    result = pool.apply_async(runCase, (agent_class, environment_class, self.steps)).get(self.timeout)
+                except multiprocessing.TimeoutError:
+                    pool.terminate()
+                    pool = context.Pool(1, maxtasksperchild=1)
+                    result = Benchmark.failure(agent_class, environment_class, 'timed out after ' + str(self.timeout) + 's')
+                results.append(result)
+                print(Benchmark.describe(result), flush=True)
+        finally:
+            pool.terminate()
+        return {'commit': commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                'steps': self.steps, 'results': results}
+
+    @staticmethod
+    def failure(agent_class, environment_class, error):
+        return {'agent': agent_class.displayName, 'environment': environment_class.displayName, 'error': error}
+
+    @staticmethod
+    def describe(result):
+        name = result['agent'] + ' / ' + result['environment']
+        if 'error' in result:
+            return name + ': ' + result['error']
+        return '{}: {:.1f} steps/sec, {:.3f} ms/update, first action after {:.2f}s, peak RSS {} MB'.format(
+            name, result['stepsPerSecond'], result['updateMs'], result['timeToFirstAction'],
+            'n/a' if result['peakRssMb'] is None else '{:.1f}'.format(result['peakRssMb']))
+
+
+def runCase(agent_class, environment_class, steps):
+    try:
+        return measure(agent_class, environment_class, steps)
+    except Exception as e:
+        return Benchmark.failure(agent_class, environment_class, type(e).__name__ + ': ' + str(e))
+
+
+def measure(agent_class, environment_class, steps):
+    start = time.perf_counter()
+    environment = environment_class()
+    environment.reset()
+    agent = agent_class(environment.state_size, environment.action_size,
+                        *[param.default for param in agent_class.parameters])
+    if environment.stateBins:
+        agent.setStateBins(environment.stateBins)
+    if environment.stateBounds:
+        agent.setStateBounds(environment.stateBounds)
+    if environment.transitions:
+        agent.setTransitions(environment.transitions)
+    agent.choose_action(environment.state)
+    timeToFirstAction = time.perf_counter() - start
+
+    min_epsilon, max_epsilon, decay_rate = agent.min_epsilon, agent.max_epsilon, agent.decay_rate
+    epsilon = max_epsilon
+    timer = Model.PhaseTimer()
+    updateTimes = []
+    episode = 0
+    loopStart = time.perf_counter()
+    for step in range(steps):
+        timer.mark()
+        old_state = environment.state
+        if random.uniform(0, 1) > epsilon:
+            action = agent.choose_action(old_state)
+        else:
+            action = environment.sample_action()
+        timer.lap(Model.PhaseTimer.CHOOSE_ACTION)
+
+        reward = environment.step(action)
+        timer.lap(Model.PhaseTimer.ENV_STEP)
+
+        updateStart = timer.last
+        loss = agent.remember(old_state, action, reward, environment.state, environment.done)
+        timer.lap(Model.PhaseTimer.REMEMBER)
+        # calls that only stored the transition report no loss
+        if loss:
+            updateTimes.append(timer.last - updateStart)
+
+        if environment.done:
+            episode += 1
+            epsilon = min_epsilon + (max_epsilon - min_epsilon) * np.exp(-decay_rate * episode)
+            timer.mark()
+            environment.reset()
+            timer.lap(Model.PhaseTimer.ENV_STEP)
+    agent.finishTraining()
+    elapsed = time.perf_counter() - loopStart
+    environment.close()
+
+    return {'agent': agent_class.displayName, 'environment': environment_class.displayName, 'steps': steps,
+            'episodes': episode, 'seconds': elapsed, 'stepsPerSecond': steps / elapsed,
+            'updateMs': 1000 * (float(np.mean(updateTimes)) if updateTimes else timer.totals[Model.PhaseTimer.REMEMBER] / steps),
+            'updates': len(updateTimes), 'timeToFirstAction': timeToFirstAction, 'peakRssMb': peakRssMb(),
+            'phaseTimes': {phase: seconds for phase, seconds in timer.totals.items() if seconds > 0}}
+
+
+def peakRssMb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv):
+    arguments = controller.Controller.parseArguments(argv)
+
+    benchmark = Benchmark(int(arguments.get('steps', 5000)), float(arguments.get('timeout', 600)),
+                          arguments['agents'].split(',') if 'agents' in arguments else None,
+                          arguments['environments'].split(',') if 'environments' in arguments else None)
+    report = benchmark.run()
+    output = arguments.get('output', 'benchmark.json')
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print('Results written to ' + output)
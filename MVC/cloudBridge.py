@@ -1,4 +1,3 @@
-import boto3
 import uuid
 
 class CloudBridge:
@@ -8,6 +7,7 @@ class CloudBridge:
         self.secretKey = secretKey
         self.accessKey = accessKey
 
+        import boto3
         self.s3Client = boto3.Session (
             aws_access_key_id = accessKey,
             aws_secret_access_key = secretKey,
@@ -37,43 +37,25 @@ class CloudBridge:
     def refresh(self):
         self.state = "Idle"
 
-        # Step Variables
-        self.episodeAccEpsilon = 0
-        self.episodeAccReward = 0
-        self.episodeAccLoss = 0
-        self.curEpisodeSteps = 0
+        # Episode Variables
+        self.trainingEpisodes = 0
+        self.totalReward = 0
 
         self.animationFrames.clear()
 
-    def submitStep(self, frame, epsilon, reward, loss):
-        self.animationFrames.append(frame)
-
-        # Accumulate Step
-        self.episodeAccEpsilon += epsilon
-        self.episodeAccReward += reward
-        self.episodeAccLoss += loss
-        self.curEpisodeSteps += 1
-
-    def submitEpisode(self, episode):
+    def submitEpisode(self, summary):
         self.trainingEpisodes += 1
+        self.totalReward += summary.reward
 
         # Redraw Graph
-        avgLoss = self.episodeAccLoss / self.curEpisodeSteps
-        totalReward = self.episodeAccReward
-        avgEpsilon = self.episodeAccEpsilon / self.curEpisodeSteps
-
-        graphPoints = (avgLoss, totalReward, avgEpsilon)
-
-        self.curEpisodeSteps = 0
-        self.episodeAccLoss = 0
-        self.episodeAccReward = 0
-        self.episodeAccEpsilon = 0
+        graphPoints = (summary.loss, summary.reward, summary.epsilon)
 
+        self.animationFrames = list(summary.frames)
         if (len(self.animationFrames) > 0):
-            self.animationFrames[0].save('./' + self.name + '-episode-' + str(episode) + ".gif", save_all=True, append_images=self.animationFrames)
+            self.animationFrames[0].save('./' + self.name + '-episode-' + str(summary.episode) + ".gif", save_all=True, append_images=self.animationFrames)
         
     def submitTrainFinish(self):
-        totalReward = self.episodeAccReward
-        avgReward = totalReward / self.trainingEpisodes
+        totalReward = self.totalReward
+        avgReward = totalReward / max(1, self.trainingEpisodes)
 
         self.state = "Finished"
@@ -1,8 +1,7 @@
-import tkinter
-
-from MVC import view, model, terminalView
+from MVC import model, modelProcess
 import threading
 import queue
+import json
 import sys
 
 # pip install pillow
@@ -24,7 +23,7 @@ class Controller:
     def __init__(self, argv):
         self.models = {}
         self.viewListener = self.ViewListener(self)
-        self.arguments = {}
+        self.arguments = Controller.parseArguments(argv)
 
         self.jobID = None
         self.secretKey = None
@@ -32,17 +31,17 @@ class Controller:
         self.sessionToken = None
         self.name = None
 
-        if "--terminal" in argv: 
-            self.view = terminalView.View(self.viewListener)
-        else:
-            self.view = view.View(self.viewListener)
-        flagName = ""
-        for arg in argv:
-            if "--" in arg:
-                flagName = arg[2:]
-                self.arguments[flagName] = ""
-            elif flagName != "":
-                self.arguments[flagName] += arg
+        self.numEnvironments = 1
+        self.numEnvWorkers = 0
+        self.numHogwildWorkers = 0
+        self.useKernel = False
+        self.renderPolicy = None
+        self.renderInterval = 1
+        # message queues hold at most queueSize episode summaries; see Model.queuePolicy
+        self.queueSize = 100
+        self.queuePolicy = model.Model.QUEUE_BLOCK
+        # run each tab's Model in its own worker process
+        self.modelProcesses = False
 
         # Process arguments
         if "jobID" in self.arguments:
@@ -53,15 +52,108 @@ class Controller:
             self.accessKey = self.arguments["accessKey"]
         if "sessionToken" in self.arguments:
             self.sessionToken = self.arguments["sessionToken"]
+        if "numEnvironments" in self.arguments:
+            self.numEnvironments = int(self.arguments["numEnvironments"])
+        if "envWorkers" in self.arguments:
+            self.numEnvWorkers = int(self.arguments["envWorkers"])
+        if "hogwildWorkers" in self.arguments:
+            self.numHogwildWorkers = int(self.arguments["hogwildWorkers"])
+        if Controller.enabled(self.arguments, "compiledKernel"):
+            self.useKernel = True
+        if "renderPolicy" in self.arguments:
+            # never, always, displayed, or a number N to render every Nth episode
+            policy = self.arguments["renderPolicy"]
+            if policy.isdigit():
+                self.renderPolicy = model.Model.RENDER_INTERVAL
+                self.renderInterval = max(1, int(policy))
+            else:
+                self.renderPolicy = Controller.choose("renderPolicy", policy, {"never": model.Model.RENDER_NEVER,
+                                                                               "always": model.Model.RENDER_ALWAYS,
+                                                                               "displayed": model.Model.RENDER_DISPLAYED},
+                                                      "a number N to render every Nth episode")
+        elif self.secretKey is not None and self.accessKey is not None:
+            # the cloud bridge saves every episode as an animation
+            self.renderPolicy = model.Model.RENDER_ALWAYS
+        elif "--terminal" in argv or "--headless" in argv:
+            # the terminal and headless views never show frames
+            self.renderPolicy = model.Model.RENDER_NEVER
+        else:
+            self.renderPolicy = model.Model.RENDER_DISPLAYED
+
+        if Controller.enabled(self.arguments, "modelProcesses"):
+            self.modelProcesses = True
+        if "queueSize" in self.arguments:
+            self.queueSize = int(self.arguments["queueSize"])
+        if "queuePolicy" in self.arguments:
+            self.queuePolicy = Controller.choose("queuePolicy", self.arguments["queuePolicy"],
+                                                 {"block": model.Model.QUEUE_BLOCK, "drop": model.Model.QUEUE_DROP})
+
+        # the views block in their main loops, so they are created once the arguments are processed.
+        # They are imported here so that the terminal and headless views never load tkinter
+        if "--headless" in argv:
+            from MVC import headlessView
+            self.view = headlessView.View(self.viewListener, self.arguments)
+        elif "--terminal" in argv:
+            from MVC import terminalView
+            self.view = terminalView.View(self.viewListener)
+        else:
+            from MVC import view
+            self.view = view.View(self.viewListener)
+
+    @staticmethod
+    def parseArguments(argv):
+        arguments = {}
+        # a --config JSON file supplies defaults that the command line flags override
+        if "--config" in argv and argv.index("--config") + 1 < len(argv):
+            with open(argv[argv.index("--config") + 1]) as file:
+                for key, value in json.load(file).items():
+                    if isinstance(value, bool):
+                        arguments[key] = json.dumps(value)
+                    else:
+                        arguments[key] = value if isinstance(value, (dict, list)) else str(value)
+
+        flagName = ""
+        for arg in argv:
+            if "--" in arg:
+                flagName = arg[2:]
+                arguments[flagName] = ""
+            elif flagName != "":
+                arguments[flagName] += arg
+        return arguments
+
+    @staticmethod
+    def enabled(arguments, flag):
+        # a bare command line flag is "", a config file switch "true" or "false"
+        return flag in arguments and str(arguments[flag]).lower() not in ("false", "0")
+
+    @staticmethod
+    def choose(flag, value, choices, other=None):
+        if value not in choices:
+            accepted = ', '.join(choices) + (', or ' + other if other else '')
+            sys.exit('Unknown --' + flag + ' ' + repr(value) + '; choose one of: ' + accepted)
+        return choices[value]
+
     class ViewListener:
         def __init__(self, controller):
             self.controller = controller
             self.messageQueues = {}
+            # the thread each tab last trained or tested in
+            self.runners = {}
 
         def getModel(self, tabID):
             curModel = self.controller.models.get(tabID)
             if not curModel:
-                curModel = model.Model()
+                if self.controller.modelProcesses:
+                    curModel = modelProcess.ModelProcess(self.controller.queueSize)
+                else:
+                    curModel = model.Model()
+                curModel.numEnvironments = self.controller.numEnvironments
+                curModel.numEnvWorkers = self.controller.numEnvWorkers
+                curModel.numHogwildWorkers = self.controller.numHogwildWorkers
+                curModel.useKernel = self.controller.useKernel
+                curModel.renderPolicy = self.controller.renderPolicy
+                curModel.renderInterval = self.controller.renderInterval
+                curModel.queuePolicy = self.controller.queuePolicy
 
                 if (self.controller.secretKey is not None and self.controller.accessKey is not None):
                     curModel.createBridge(self.controller.jobID, self.controller.secretKey, self.controller.accessKey, self.controller.sessionToken)
@@ -72,7 +164,7 @@ class Controller:
         def getQueue(self, tabID):
             curQueue = self.messageQueues.get(tabID)
             if not curQueue:
-                curQueue = queue.Queue()
+                curQueue = queue.Queue(maxsize=self.controller.queueSize)
                 self.messageQueues[tabID] = curQueue
             return curQueue
 
@@ -91,17 +183,31 @@ class Controller:
         def startTraining(self, tabID, args):
             model = self.getModel(tabID)
             queue = self.getQueue(tabID)
-            threading.Thread(target=model.run_learning, args=[queue,]+args).start()
+            self.startRunner(tabID, model.run_learning, [queue,]+args)
 
         def startTesting(self, tabID, args):
             model = self.getModel(tabID)
             queue = self.getQueue(tabID)
-            if model.agent or model.loadFilename:
-                threading.Thread(target=model.run_testing, args=[queue,]+args).start()
+            if model.canTest():
+                self.startRunner(tabID, model.run_testing, [queue,]+args)
                 return True
             else:
                 return False
 
+        def startRunner(self, tabID, target, args):
+            runner = threading.Thread(target=target, args=args, daemon=True)
+            self.runners[tabID] = runner
+            runner.start()
+
+        def runnerIsAlive(self, tabID):
+            # a run that raises ends its thread without announcing that it finished
+            runner = self.runners.get(tabID)
+            return runner is not None and runner.is_alive()
+
+        def requestFrames(self, tabID):
+            model = self.getModel(tabID)
+            model.requestFrames()
+
         def modelIsRunning(self, tabID):
             model = self.getModel(tabID)
             return model.isRunning
@@ -119,8 +225,8 @@ class Controller:
             model.reset()
 
         def close(self, tabID):
-            self.halt(tabID)
             if self.controller.models.get(tabID):
+                self.controller.models[tabID].close()
                 del self.controller.models[tabID]
             if self.messageQueues.get(tabID):
                 del self.messageQueues[tabID]
@@ -0,0 +1,101 @@
+import json
+import os
+import queue
+import sys
+
+from MVC.model import Model
+from MVC import registry
+
+"""Runs training and testing without any prompts, taking everything from the Controller's arguments,
+which come from the command line or a --config JSON file. Episode summaries are appended to a
+metrics file as JSON lines. Neither tkinter nor PIL.ImageTk is imported.
+
+Recognised arguments:
+    agent, environment      display names, as listed in MVC.registry
+    parameters              agent hyperparameters by name, either a JSON object in the config file
+                            or "Name=value,Name=value" on the command line; the rest use their defaults
+    episodes, maxSteps      training episodes and maximum steps per episode (0 episodes skips training)
+    testEpisodes            testing episodes run after training (default 0)
+    load, save              agent files to load before training and save after it
+    metrics                 file that episode summaries are appended to (default metrics.jsonl)
+    framesDir               directory rendered episodes are saved to as gifs
+"""
+class View:
+    def __init__(self, listener, arguments):
+        self.listener = listener
+        self.arguments = arguments
+
+        agentClass = View.find(registry.agents, arguments.get('agent'), 'agent')
+        environmentClass = View.find(registry.environments, arguments.get('environment'), 'environment')
+        self.listener.setEnvironment(0, environmentClass)
+        self.listener.setAgent(0, agentClass)
+        self.paramValues = [int(float(arguments.get('episodes', 1000))), int(float(arguments.get('maxSteps', 200)))]
+        self.paramValues += View.parameterValues(agentClass, arguments.get('parameters', {}))
+
+        self.framesDir = arguments.get('framesDir')
+        if self.framesDir:
+            os.makedirs(self.framesDir, exist_ok=True)
+
+        with open(arguments.get('metrics', 'metrics.jsonl'), 'a') as self.metrics:
+            if arguments.get('load'):
+                self.listener.load(arguments['load'], 0)
+            if self.paramValues[0] > 0:
+                self.listener.startTraining(0, self.paramValues)
+                self.drain('train')
+                if arguments.get('save'):
+                    self.listener.save(arguments['save'], 0)
+            testEpisodes = int(float(arguments.get('testEpisodes', 0)))
+            if testEpisodes > 0:
+                if self.listener.startTesting(0, [testEpisodes] + self.paramValues[1:]):
+                    self.drain('test')
+                else:
+                    print('Nothing to test: train or load an agent first')
+        self.listener.close(0)
+
+    @staticmethod
+    def find(classes, name, kind):
+        cls = registry.find(classes, name)
+        if cls:
+            return cls
+        sys.exit('Unknown ' + kind + ' ' + repr(name) + '; choose one of: ' + ', '.join(cls.displayName for cls in classes))
+
+    @staticmethod
+    def parameterValues(agentClass, values):
+        if isinstance(values, str):
+            values = dict(pair.split('=', 1) for pair in values.split(',') if pair)
+        unknown = set(values) - set(param.name for param in agentClass.parameters)
+        if unknown:
+            sys.exit('Unknown parameters for ' + agentClass.displayName + ': ' + ', '.join(sorted(unknown)))
+        return [View.convert(param, values.get(param.name, param.default)) for param in agentClass.parameters]
+
+    @staticmethod
+    def convert(param, value):
+        return int(float(value)) if param.resolution % 1 == 0 else float(value)
+
+    def drain(self, phase):
+        messageQueue = self.listener.getQueue(0)
+        while True:
+            try:
+                message = messageQueue.get(timeout=0.1)
+            except queue.Empty:
+                if self.listener.runnerIsAlive(0):
+                    continue
+                sys.exit(phase + ' failed')
+            if message.type == Model.Message.SUMMARY:
+                self.record(phase, message.data)
+            elif message.type == Model.Message.EVENT:
+                print(phase + ' finished')
+                return
+
+    def record(self, phase, summary):
+        self.metrics.write(json.dumps({'phase': phase, 'episode': summary.episode, 'steps': summary.steps,
+                                       'reward': float(summary.reward),
+                                       'loss': None if summary.loss is None else float(summary.loss),
+                                       'epsilon': summary.epsilon, 'duration': summary.duration,
+                                       'stepsPerSecond': summary.stepsPerSecond,
+                                       'phaseTimes': summary.phaseTimes}) + '\n')
+        self.metrics.flush()
+        if self.framesDir and summary.frames:
+            path = os.path.join(self.framesDir, phase + '-episode-' + str(summary.episode) + '.gif')
+            summary.frames[0].save(path, save_all=True, append_images=summary.frames[1:])
+        print(phase + ' episode ' + str(summary.episode) + ': reward = ' + str(summary.reward) + ', ' + summary.timingReport())
@@ -0,0 +1,134 @@
+import multiprocessing
+import queue
+import random
+import traceback
+
+import numpy as np
+
+from Agents import qTable
+from MVC.model import Model
+from Environments.subprocVectorEnv import classSpec, loadClass
+
+"""Trains a tabular agent in several worker processes at once (Hogwild). The Q-table is moved into
+shared memory and every worker runs its own environment and agent against it, updating entries
+without any locking. Two workers rarely write the same entry at the same moment when the table is
+much larger than the number of workers, and a lost update only adds a little noise.
+
+The coordinator runs in the Model's training thread: workers claim episode numbers from a shared
+counter, start each episode with the epsilon the coordinator last set from the number of episodes
+finished so far, and send their episode summaries back to it to be published. Workers do not render.
+
+Only agents whose Q-table is dense can be trained this way, that is QTable agents on environments
+that declare stateBins.
+"""
+class Hogwild:
+    def __init__(self, agent, agent_class, environment_class, model_args, numWorkers, total_episodes, max_steps):
+        context = multiprocessing.get_context()
+        self.agent = agent
+        self.min_epsilon, self.max_epsilon, self.decay_rate = agent.min_epsilon, agent.max_epsilon, agent.decay_rate
+        values = agent.qtable.values
+        self.buffer = context.RawArray('d', values.size)
+        self.shared = np.frombuffer(self.buffer).reshape(values.shape)
+        self.shared[...] = values
+        # the Model's own agent sees the table as it is being trained
+        agent.qtable = qTable.QTable.DenseTable(self.shared)
+
+        self.claimed = context.Value('q', 0)
+        self.epsilon = context.RawValue('d', self.max_epsilon)
+        self.stopFlag = context.RawValue('b', 0)
+        self.results = context.Queue()
+        self.processes = []
+        seed = random.randrange(2**31)
+        for worker in range(numWorkers):
+            process = context.Process(target=_learn, daemon=True,
+                                      args=(classSpec(agent_class), classSpec(environment_class), list(model_args),
+                                            values.shape, self.buffer, self.claimed, int(total_episodes),
+                                            int(max_steps), self.epsilon, self.stopFlag, self.results, seed + worker))
+            process.start()
+            self.processes.append(process)
+
+    def summaries(self):
+        """Yields the workers' episode summaries, numbered in the order they finish, until every worker is done"""
+        running = len(self.processes)
+        finished = 0
+        while running:
+            try:
+                summary = self.results.get(timeout=1)
+            except queue.Empty:
+                # a worker that died without reporting does not count
+                running = min(running, sum(process.is_alive() for process in self.processes))
+                continue
+            if summary is None:
+                running -= 1
+                continue
+            summary.episode = finished
+            finished += 1
+            self.epsilon.value = self.min_epsilon + (self.max_epsilon - self.min_epsilon) * np.exp(-self.decay_rate * finished)
+            yield summary
+
+    def stop(self):
+        self.stopFlag.value = 1
+
+    def close(self):
+        self.stop()
+        for process in self.processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        # give the agent back a private table so the shared memory can be released
+        self.agent.qtable = qTable.QTable.DenseTable(self.shared.copy())
+
+
+def supports(agent):
+    # daemonic processes, such as a ModelProcess worker, cannot start processes of their own
+    return isinstance(agent, qTable.QTable) and isinstance(agent.qtable, qTable.QTable.DenseTable) \
+        and not multiprocessing.current_process().daemon
+
+
+def _learn(agentSpec, envSpec, model_args, shape, buffer, claimed, total_episodes, max_steps, epsilon, stopFlag,
+           results, seed):
+    try:
+        random.seed(seed)
+        np.random.seed(seed)
+        environment = loadClass(*envSpec)()
+        agent = loadClass(*agentSpec)(environment.state_size, environment.action_size, *model_args)
+        agent.setStateBins(environment.stateBins)
+        agent.qtable = qTable.QTable.DenseTable(np.frombuffer(buffer).reshape(shape))
+        timer = Model.PhaseTimer()
+
+        while not stopFlag.value:
+            with claimed.get_lock():
+                episode = claimed.value
+                if episode >= total_episodes:
+                    break
+                claimed.value += 1
+            stats = Model.EpisodeStats(timer)
+            episodeEpsilon = epsilon.value
+            timer.mark()
+            environment.reset()
+            timer.lap(Model.PhaseTimer.ENV_STEP)
+            for step in range(max_steps):
+                timer.mark()
+                old_state = environment.state
+                if random.uniform(0, 1) > episodeEpsilon:
+                    action = agent.choose_action(old_state)
+                else:
+                    action = environment.sample_action()
+                timer.lap(Model.PhaseTimer.CHOOSE_ACTION)
+
+                reward = environment.step(action)
+                timer.lap(Model.PhaseTimer.ENV_STEP)
+
+                loss = agent.remember(old_state, action, reward, environment.state, environment.done)
+                timer.lap(Model.PhaseTimer.REMEMBER)
+                stats.add(None, episodeEpsilon, reward, loss)
+
+                if environment.done or stopFlag.value:
+                    break
+            results.put(stats.summarize(episode))
+        environment.close()
+    except Exception:
+        traceback.print_exc()
+    finally:
+        results.put(None)
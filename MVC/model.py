@@ -1,10 +1,25 @@
 import random
+import queue
+import time
 import numpy as np
-from Agents import drqn
-import cProfile
+from Agents import drqn, numpyPolicy
 from MVC import cloudBridge
+from Environments import vectorEnv, subprocVectorEnv
 
 class Model:
+    # render policies
+    RENDER_NEVER = 0
+    RENDER_INTERVAL = 1
+    RENDER_DISPLAYED = 2
+    RENDER_ALWAYS = 3
+
+    # what to do with an episode summary when the message queue is full
+    QUEUE_BLOCK = 0
+    QUEUE_DROP = 1
+
+    # how long each call into the compiled training loop should run before summaries are published
+    KERNEL_CALL_SECONDS = 0.1
+
     def __init__(self):
         # these can be set directly from the Controller based on user input from the View
         self.environment_class = None
@@ -15,19 +30,35 @@ class Model:
         self.agent = None
         self.loadFilename = None
         self.cloudBridge = None
+        # number of environment copies stepped in lockstep during training
+        self.numEnvironments = 1
+        # number of worker processes the environment copies are spread over (0 steps them in this process)
+        self.numEnvWorkers = 0
+        self.vectorEnvironment = None
+        # number of worker processes that train a tabular agent's shared Q-table at once (see MVC.hogwild)
+        self.numHogwildWorkers = 0
+        # train tabular agents in a numba-compiled loop when the agent and environment allow it
+        self.useKernel = False
+        # which episodes the environment is asked to render; RENDER_INTERVAL renders every renderInterval-th
+        # episode and RENDER_DISPLAYED renders the next episode once the view has asked for frames
+        self.renderPolicy = Model.RENDER_ALWAYS
+        self.renderInterval = 1
+        self.framesRequested = True
+        # QUEUE_BLOCK waits for the consumer to make room, QUEUE_DROP discards the summary and counts it
+        self.queuePolicy = Model.QUEUE_BLOCK
+        self.droppedSummaries = 0
+        self.isClosed = False
+        # accumulates the time spent in each phase of the training and testing loops
+        self.timer = Model.PhaseTimer()
 
     def createBridge(self, jobID, secretKey, accessKey, sessionToken):
         print("Bridge Created")
         if (self.cloudBridge is None):
             cloudBridge.CloudBridge(jobID, secretKey, accessKey, sessionToken)
 
-    # def run_learning(self, messageQueue, total_episodes, max_steps, *model_args):
-    #     cProfile.runctx('self.run_learning2(messageQueue, total_episodes, max_steps, *model_args)', globals(), locals(),
-    #                     'stats')
-
-    # def run_learning2(self, messageQueue, total_episodes, max_steps, *model_args):
     def run_learning(self, messageQueue, total_episodes, max_steps, *model_args):
         self.isRunning = True
+        self.framesRequested = True
 
         if (self.cloudBridge is not None):
             self.cloudBridge.refresh()
@@ -36,24 +67,63 @@ class Model:
         if not self.environment:
             self.environment = self.environment_class()
 
-        if self.loadFilename:
-            self.agent = self.agent_class(self.environment.state_size, self.environment.action_size, *model_args)
+        if self.loadFilename and numpyPolicy.isPolicyFile(self.loadFilename):
+            print('exported policies can only be tested; training a new agent')
+            self.loadFilename = None
+            self.agent = self.createAgent(model_args)
+        elif self.loadFilename:
+            self.agent = self.createAgent(model_args)
             self.agent.load(self.loadFilename)
             self.loadFilename = None
-        elif not self.agent:
-            self.agent = self.agent_class(self.environment.state_size, self.environment.action_size, *model_args)
+        elif not self.agent or isinstance(self.agent, numpyPolicy.PolicyAgent):
+            self.agent = self.createAgent(model_args)
         else:  # if agent already exists, update the model arguments
             mem = self.agent.memsave()
-            self.agent = self.agent_class(self.environment.state_size, self.environment.action_size, *model_args)
+            self.agent = self.createAgent(model_args)
             self.agent.memload(mem)
 
+        if self.useKernel and self.supportsKernel():
+            self.trainKernel(messageQueue, total_episodes, max_steps)
+        elif self.numHogwildWorkers > 1 and self.supportsHogwild():
+            self.trainHogwild(messageQueue, total_episodes, max_steps, model_args)
+        elif (self.numEnvironments > 1 or self.numEnvWorkers > 0) and self.agent.supportsVectorEnv:
+            self.trainVectorized(messageQueue, total_episodes, max_steps)
+        else:
+            self.trainSingle(messageQueue, total_episodes, max_steps)
+        self.agent.finishTraining()
+
+        if (self.cloudBridge is not None):
+            self.cloudBridge.submitTrainFinish()
+
+        message = Model.Message(Model.Message.EVENT, Model.Message.TRAIN_FINISHED)
+        self.publish(messageQueue, message)
+        self.isRunning = False
+        print('learning done')
+
+    def createAgent(self, model_args):
+        agent = self.agent_class(self.environment.state_size, self.environment.action_size, *model_args)
+        if self.environment.stateBins:
+            agent.setStateBins(self.environment.stateBins)
+        if self.environment.stateBounds:
+            agent.setStateBounds(self.environment.stateBounds)
+        if self.environment.transitions:
+            agent.setTransitions(self.environment.transitions)
+        return agent
+
+    def trainSingle(self, messageQueue, total_episodes, max_steps):
         min_epsilon, max_epsilon, decay_rate = self.agent.min_epsilon, self.agent.max_epsilon, self.agent.decay_rate
         epsilon = max_epsilon
+        timer = self.timer
+        stats = Model.EpisodeStats(timer)
 
         for episode in range(int(total_episodes)):
+            timer.mark()
             self.environment.reset()
+            timer.lap(Model.PhaseTimer.ENV_STEP)
+            render = self.shouldRender(episode)
 
             for step in range(int(max_steps)):
+                timer.mark()
                 old_state = self.environment.state
                 exp_exp_tradeoff = random.uniform(0, 1)
 
@@ -61,28 +131,24 @@ class Model:
                     action = self.agent.choose_action(old_state)
                 else:
                     action = self.environment.sample_action()
+                timer.lap(Model.PhaseTimer.CHOOSE_ACTION)
 
                 reward = self.environment.step(action)
+                timer.lap(Model.PhaseTimer.ENV_STEP)
 
                 loss = self.agent.remember(old_state, action, reward, self.environment.state, self.environment.done)
+                timer.lap(Model.PhaseTimer.REMEMBER)
 
-                frame = self.environment.render()
-                modelState = Model.State(frame, epsilon, reward, loss)
-
-                if (self.cloudBridge is not None):
-                    self.cloudBridge.submitStep(frame, epsilon, reward, loss)
-
-                message = Model.Message(Model.Message.STATE, modelState)
-                messageQueue.put(message)
+                frame = self.environment.render() if render else None
+                timer.lap(Model.PhaseTimer.RENDER)
+                stats.add(frame, epsilon, reward, loss)
 
                 if self.environment.done or self.isHalted:
                     break
 
-            if (self.cloudBridge is not None):
-                self.cloudBridge.submitEpisode(episode)
-
-            message = Model.Message(Model.Message.EVENT, Model.Message.EPISODE)
-            messageQueue.put(message)
+            summary = stats.summarize(episode)
+            stats = Model.EpisodeStats(timer)
+            self.publishEpisode(messageQueue, summary)
 
             epsilon = min_epsilon + (max_epsilon - min_epsilon) * np.exp(-decay_rate * episode)
 
@@ -90,18 +156,125 @@ class Model:
                 self.isHalted = False
                 break
 
-        if (self.cloudBridge is not None):
-            self.cloudBridge.submitTrainFinish()
+    def supportsKernel(self):
+        from Agents import tabularKernel
+        return tabularKernel.supports(self.agent, self.environment)
+
+    def trainKernel(self, messageQueue, total_episodes, max_steps):
+        from Agents import tabularKernel
+        trainer = tabularKernel.Trainer(self.agent, self.environment)
+        episode = 0
+        # the first call compiles, so run one episode, then size the calls to take about KERNEL_CALL_SECONDS
+        chunk = 1
+        while episode < int(total_episodes) and not self.isHalted:
+            chunk = min(chunk, int(total_episodes) - episode)
+            start = time.perf_counter()
+            rewards, steps, losses, epsilons = trainer.run(episode, chunk, max_steps)
+            duration = time.perf_counter() - start
+            totalSteps = max(1, int(steps.sum()))
+            for ind in range(chunk):
+                summary = Model.Summary(episode + ind, int(steps[ind]), float(rewards[ind]), float(losses[ind]),
+                                        float(epsilons[ind]), [], duration * steps[ind] / totalSteps)
+                self.publishEpisode(messageQueue, summary)
+            episode += chunk
+            chunk = max(1, int(chunk * Model.KERNEL_CALL_SECONDS / max(duration, 1e-6)))
+        self.isHalted = False
 
-        message = Model.Message(Model.Message.EVENT, Model.Message.TRAIN_FINISHED)
-        messageQueue.put(message)
-        self.isRunning = False
-        print('learning done')
+    def supportsHogwild(self):
+        from MVC import hogwild
+        return hogwild.supports(self.agent)
+
+    def trainHogwild(self, messageQueue, total_episodes, max_steps, model_args):
+        from MVC import hogwild
+        learners = hogwild.Hogwild(self.agent, self.agent_class, self.environment_class, model_args,
+                                   self.numHogwildWorkers, total_episodes, max_steps)
+        try:
+            for summary in learners.summaries():
+                self.publishEpisode(messageQueue, summary)
+                if self.isHalted:
+                    learners.stop()
+        finally:
+            learners.close()
+        self.isHalted = False
+
+    def trainVectorized(self, messageQueue, total_episodes, max_steps):
+        if not self.vectorEnvironment or self.vectorEnvironment.num_envs != self.numEnvironments:
+            self.closeVectorEnvironment()
+            # a ModelProcess worker cannot start environment workers, so it steps the copies itself
+            if self.numEnvWorkers > 0 and subprocVectorEnv.supported():
+                self.vectorEnvironment = subprocVectorEnv.SubprocVectorEnv(self.environment_class, self.numEnvironments,
+                                                                           self.numEnvWorkers, self.environment)
+            else:
+                self.vectorEnvironment = vectorEnv.VectorEnv(self.environment_class, self.numEnvironments, self.environment)
+        envs = self.vectorEnvironment
+        numEnvs = envs.num_envs
+
+        min_epsilon, max_epsilon, decay_rate = self.agent.min_epsilon, self.agent.max_epsilon, self.agent.decay_rate
+        # each copy keeps its own episode count, epsilon schedule and step count
+        envEpisodes = [0] * numEnvs
+        epsilons = [max_epsilon] * numEnvs
+        steps = [0] * numEnvs
+        timer = self.timer
+        episodeStats = [Model.EpisodeStats(timer) for _ in range(numEnvs)]
+
+        episode = 0
+        timer.mark()
+        envs.reset_all()
+        timer.lap(Model.PhaseTimer.ENV_STEP)
+        render = self.shouldRender(0)
+        while episode < int(total_episodes) and not self.isHalted:
+            timer.mark()
+            old_states = envs.states
+            actions = envs.sample_actions()
+            greedy = [ind for ind in range(numEnvs) if random.uniform(0, 1) > epsilons[ind]]
+            if greedy:
+                chosen = self.agent.choose_actions([old_states[ind] for ind in greedy])
+                for ind, action in zip(greedy, chosen):
+                    actions[ind] = action
+            timer.lap(Model.PhaseTimer.CHOOSE_ACTION)
+
+            rewards = envs.step(actions)
+            new_states, dones = envs.states, envs.dones
+            timer.lap(Model.PhaseTimer.ENV_STEP)
+            losses = self.agent.remember_batch(old_states, actions, rewards, new_states, dones)
+            timer.lap(Model.PhaseTimer.REMEMBER)
+
+            # only the first copy is rendered
+            frame = envs.render(0) if render else None
+            timer.lap(Model.PhaseTimer.RENDER)
+
+            finished = []
+            for ind in range(numEnvs):
+                steps[ind] += 1
+                episodeStats[ind].add(frame if ind == 0 else None, epsilons[ind], rewards[ind], losses[ind])
+
+                if dones[ind] or steps[ind] >= int(max_steps):
+                    summary = episodeStats[ind].summarize(episode)
+                    episodeStats[ind] = Model.EpisodeStats(timer)
+                    self.publishEpisode(messageQueue, summary)
+
+                    epsilons[ind] = min_epsilon + (max_epsilon - min_epsilon) * np.exp(-decay_rate * envEpisodes[ind])
+                    envEpisodes[ind] += 1
+                    episode += 1
+                    steps[ind] = 0
+                    finished.append(ind)
+                    if ind == 0:
+                        render = self.shouldRender(envEpisodes[0])
+
+                    if episode >= int(total_episodes):
+                        break
+            if finished:
+                timer.mark()
+                envs.reset_batch(finished)
+                timer.lap(Model.PhaseTimer.ENV_STEP)
+
+        self.isHalted = False
 
     def run_testing(self, messageQueue, total_episodes, max_steps, *model_args):
         total_episodes = int(total_episodes+0.5)
         max_steps = int(max_steps+0.5)
         self.isRunning = True
+        self.framesRequested = True
 
         if (self.cloudBridge is not None):
             self.cloudBridge.refresh()
@@ -110,21 +283,32 @@ class Model:
         if not self.environment:
             self.environment = self.environment_class()
 
-        if self.loadFilename:
-            self.agent = self.agent_class(self.environment.state_size, self.environment.action_size, *model_args)
+        if self.loadFilename and numpyPolicy.isPolicyFile(self.loadFilename):
+            # evaluated with NumPy alone, without building the agent or its networks
+            self.agent = numpyPolicy.PolicyAgent.fromFile(self.loadFilename)
+            self.loadFilename = None
+        elif self.loadFilename:
+            self.agent = self.createAgent(model_args)
             self.agent.load(self.loadFilename)
             self.loadFilename = None
         elif not self.agent:
+            self.isRunning = False
             return
 
         if self.agent:
             min_epsilon, max_epsilon, decay_rate = self.agent.min_epsilon, self.agent.max_epsilon, self.agent.decay_rate
             epsilon = max_epsilon
+            timer = self.timer
+            stats = Model.EpisodeStats(timer)
 
             for episode in range(int(total_episodes)):
+                timer.mark()
                 self.environment.reset()
+                timer.lap(Model.PhaseTimer.ENV_STEP)
+                render = self.shouldRender(episode)
 
                 for step in range(int(max_steps)):
+                    timer.mark()
                     old_state = self.environment.state
 
                     exp_exp_tradeoff = random.uniform(0, 1)
@@ -133,29 +317,25 @@ class Model:
                         action = self.agent.choose_action(old_state)
                     else:
                         action = self.environment.sample_action()
+                    timer.lap(Model.PhaseTimer.CHOOSE_ACTION)
 
                     reward = self.environment.step(action)
+                    timer.lap(Model.PhaseTimer.ENV_STEP)
 
-                    if isinstance(self.agent, drqn.DRQN):
-                        self.agent.addToMemory(old_state, action, reward, self.environment.state, episode, self.environment.done)
+                    if isinstance(self.agent, (drqn.DRQN, numpyPolicy.PolicyAgent)):
+                        self.agent.addToMemory(old_state, action, reward, self.environment.state, self.environment.done)
+                        timer.lap(Model.PhaseTimer.REMEMBER)
 
-                    frame = self.environment.render()
-                    
-                    if (self.cloudBridge is not None):
-                        self.cloudBridge.submitStep(frame, 0, reward, 0)
-                    
-                    modelState = Model.State(frame, None, reward, None)
-                    message = Model.Message(Model.Message.STATE, modelState)
-                    messageQueue.put(message)
+                    frame = self.environment.render() if render else None
+                    timer.lap(Model.PhaseTimer.RENDER)
+                    stats.add(frame, None, reward, None)
 
                     if self.environment.done or self.isHalted:
                         break
 
-                if (self.cloudBridge is not None):
-                    self.cloudBridge.submitEpisode(episode)
-
-                message = Model.Message(Model.Message.EVENT, Model.Message.EPISODE)
-                messageQueue.put(message)
+                summary = stats.summarize(episode)
+                stats = Model.EpisodeStats(timer)
+                self.publishEpisode(messageQueue, summary)
 
                 epsilon = min_epsilon + (max_epsilon - min_epsilon) * np.exp(-decay_rate * episode)
 
@@ -163,10 +343,50 @@ class Model:
                     self.isHalted = False
                     break
             message = Model.Message(Model.Message.EVENT, Model.Message.TEST_FINISHED)
-            messageQueue.put(message)
+            self.publish(messageQueue, message)
             print('testing done')
         self.isRunning = False
 
+    def canTest(self):
+        return bool(self.agent or self.loadFilename)
+
+    def publishEpisode(self, messageQueue, summary):
+        # the time spent publishing an episode is reported with the episode after it
+        self.timer.mark()
+        if (self.cloudBridge is not None):
+            self.cloudBridge.submitEpisode(summary)
+            self.timer.lap(Model.PhaseTimer.CLOUD_SUBMIT)
+        self.publish(messageQueue, Model.Message(Model.Message.SUMMARY, summary))
+        self.timer.lap(Model.PhaseTimer.QUEUE_PUT)
+
+    def publish(self, messageQueue, message):
+        if message.type == Model.Message.SUMMARY and self.queuePolicy == Model.QUEUE_DROP:
+            try:
+                messageQueue.put_nowait(message)
+            except queue.Full:
+                self.droppedSummaries += 1
+            return
+        # wait for room, giving up only once the consumer has gone away
+        while not self.isClosed:
+            try:
+                messageQueue.put(message, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def shouldRender(self, episode):
+        if self.renderPolicy == Model.RENDER_ALWAYS:
+            return True
+        if self.renderPolicy == Model.RENDER_INTERVAL:
+            return episode % self.renderInterval == 0
+        if self.renderPolicy == Model.RENDER_DISPLAYED and self.framesRequested:
+            self.framesRequested = False
+            return True
+        return False
+
+    def requestFrames(self):
+        self.framesRequested = True
+
     def halt_learning(self):
         if self.isRunning:
             self.isHalted = True
@@ -174,34 +394,116 @@ class Model:
                 self.cloudBridge.setState("Halted")
                 self.cloudBridge.terminate()
 
+    def close(self):
+        self.isClosed = True
+        self.halt_learning()
+
+    def closeVectorEnvironment(self):
+        if self.vectorEnvironment:
+            self.vectorEnvironment.close()
+            self.vectorEnvironment = None
+
     def reset(self):
+        self.closeVectorEnvironment()
         self.environment = None
         self.agent = None
 
     def save(self, filename):
         if self.agent:
-            self.agent.save(filename)
+            if numpyPolicy.isPolicyFile(filename) and not isinstance(self.agent, numpyPolicy.PolicyAgent):
+                self.agent.exportPolicy(filename)
+            else:
+                self.agent.save(filename)
 
     def load(self, filename):
         self.loadFilename = filename
 
     class Message:
         # types of message
-        STATE = 0
+        SUMMARY = 0
         EVENT = 1
 
         # event types
         TRAIN_FINISHED = 0
         TEST_FINISHED = 1
-        EPISODE = 2
 
         def __init__(self, type, data):
             self.type = type
             self.data = data
 
-    class State:
-        def __init__(self, image, epsilon, reward, loss):
-            self.image = image
-            self.epsilon = epsilon
+    class PhaseTimer:
+        """Accumulates wall-clock time per phase of the loop. lap charges the time since the previous
+        mark or lap to a phase, so anything between lap and the next mark is not counted."""
+        ENV_STEP = 'env step'
+        CHOOSE_ACTION = 'choose action'
+        REMEMBER = 'remember'
+        RENDER = 'render'
+        QUEUE_PUT = 'queue put'
+        CLOUD_SUBMIT = 'cloud submit'
+        PHASES = (ENV_STEP, CHOOSE_ACTION, REMEMBER, RENDER, QUEUE_PUT, CLOUD_SUBMIT)
+
+        def __init__(self):
+            self.totals = dict.fromkeys(Model.PhaseTimer.PHASES, 0.0)
+            self.last = time.perf_counter()
+
+        def mark(self):
+            self.last = time.perf_counter()
+
+        def lap(self, phase):
+            now = time.perf_counter()
+            self.totals[phase] += now - self.last
+            self.last = now
+
+    class EpisodeStats:
+        """Accumulates the steps of one episode into a Summary"""
+        def __init__(self, timer):
+            self.timer = timer
+            self.startTime = time.perf_counter()
+            self.startTotals = dict(timer.totals)
+            self.steps = 0
+            self.reward = 0
+            self.lossAccum = 0
+            self.epsilonAccum = 0
+            self.hasLoss = False
+            self.hasEpsilon = False
+            self.frames = []
+
+        def add(self, frame, epsilon, reward, loss):
+            self.steps += 1
+            self.reward += reward
+            if loss is not None:
+                self.lossAccum += loss
+                self.hasLoss = True
+            if epsilon is not None:
+                self.epsilonAccum += epsilon
+                self.hasEpsilon = True
+            if frame is not None:
+                self.frames.append(frame)
+
+        def summarize(self, episode):
+            steps = max(1, self.steps)
+            loss = self.lossAccum / steps if self.hasLoss else None
+            epsilon = self.epsilonAccum / steps if self.hasEpsilon else None
+            duration = time.perf_counter() - self.startTime
+            phaseTimes = {phase: total - self.startTotals[phase] for phase, total in self.timer.totals.items()}
+            return Model.Summary(episode, self.steps, self.reward, loss, epsilon, self.frames, duration, phaseTimes)
+
+    class Summary:
+        def __init__(self, episode, steps, reward, loss, epsilon, frames, duration=0, phaseTimes=None):
+            self.episode = episode
+            self.steps = steps
             self.reward = reward
-            self.loss = loss
\ No newline at end of file
+            # mean loss and epsilon over the steps of the episode, None while testing
+            self.loss = loss
+            self.epsilon = epsilon
+            # the rendered frames of the episode, empty unless the render policy selected it
+            self.frames = frames
+            # wall-clock seconds the episode took, and how much of it was spent in each PhaseTimer phase
+            self.duration = duration
+            self.phaseTimes = phaseTimes or {}
+            self.stepsPerSecond = steps / duration if duration > 0 else 0
+
+        def timingReport(self):
+            breakdown = ', '.join('{} {:.0%}'.format(phase, seconds / self.duration)
+                                  for phase, seconds in self.phaseTimes.items() if seconds > 0) if self.duration > 0 else ''
+            return '{:.1f} steps/sec ({})'.format(self.stepsPerSecond, breakdown)
\ No newline at end of file
@@ -0,0 +1,189 @@
+import multiprocessing
+import queue
+import threading
+import traceback
+
+from MVC.model import Model
+from Environments.subprocVectorEnv import classSpec, loadClass
+
+"""Runs a Model in its own worker process so that several tabs can train at once without
+sharing the GUI's interpreter. ModelProcess exposes the parts of the Model interface used by
+Controller.ViewListener and forwards episode summaries from the worker's bounded queue into
+the tab's message queue.
+"""
+class ModelProcess:
+    # commands sent to the worker
+    SET_ENVIRONMENT = 0
+    SET_AGENT = 1
+    TRAIN = 2
+    TEST = 3
+    HALT = 4
+    RESET = 5
+    SAVE = 6
+    LOAD = 7
+    REQUEST_FRAMES = 8
+    CREATE_BRIDGE = 9
+    CLOSE = 10
+
+    def __init__(self, queueSize=100):
+        self.environmentClass = None
+        self.agentClass = None
+        self.isRunning = False
+        self.isClosed = False
+        self.hasAgent = False
+        self.loadFilename = None
+        # copied onto the worker's Model at the start of every run
+        self.numEnvironments = 1
+        self.numEnvWorkers = 0
+        self.numHogwildWorkers = 0
+        self.useKernel = False
+        self.renderPolicy = Model.RENDER_ALWAYS
+        self.renderInterval = 1
+        self.queuePolicy = Model.QUEUE_BLOCK
+
+        context = multiprocessing.get_context()
+        self.messages = context.Queue(maxsize=queueSize)
+        self.commands, childCommands = context.Pipe()
+        self.process = context.Process(target=_serve, args=(childCommands, self.messages), daemon=True)
+        self.process.start()
+        childCommands.close()
+
+    @property
+    def environment_class(self):
+        return self.environmentClass
+
+    @environment_class.setter
+    def environment_class(self, value):
+        self.environmentClass = value
+        if value is not None:
+            self.send(ModelProcess.SET_ENVIRONMENT, classSpec(value))
+
+    @property
+    def agent_class(self):
+        return self.agentClass
+
+    @agent_class.setter
+    def agent_class(self, value):
+        self.agentClass = value
+        if value is not None:
+            self.send(ModelProcess.SET_AGENT, classSpec(value))
+
+    def send(self, command, *args):
+        if not self.isClosed:
+            self.commands.send((command, args))
+
+    def settings(self):
+        return {'numEnvironments': self.numEnvironments, 'numEnvWorkers': self.numEnvWorkers,
+                'numHogwildWorkers': self.numHogwildWorkers, 'useKernel': self.useKernel,
+                'renderPolicy': self.renderPolicy, 'renderInterval': self.renderInterval,
+                'queuePolicy': self.queuePolicy}
+
+    def createBridge(self, jobID, secretKey, accessKey, sessionToken):
+        self.send(ModelProcess.CREATE_BRIDGE, jobID, secretKey, accessKey, sessionToken)
+
+    def run_learning(self, messageQueue, *args):
+        self.isRunning = True
+        self.send(ModelProcess.TRAIN, self.settings(), args)
+        self.forward(messageQueue, Model.Message.TRAIN_FINISHED)
+        self.hasAgent = True
+        self.loadFilename = None
+        self.isRunning = False
+
+    def run_testing(self, messageQueue, *args):
+        self.isRunning = True
+        self.send(ModelProcess.TEST, self.settings(), args)
+        self.forward(messageQueue, Model.Message.TEST_FINISHED)
+        self.hasAgent = True
+        self.loadFilename = None
+        self.isRunning = False
+
+    def forward(self, messageQueue, finishEvent):
+        while not self.isClosed:
+            try:
+                message = self.messages.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            messageQueue.put(message)
+            if message.type == Model.Message.EVENT and message.data == finishEvent:
+                return
+
+    def canTest(self):
+        return bool(self.hasAgent or self.loadFilename)
+
+    def requestFrames(self):
+        self.send(ModelProcess.REQUEST_FRAMES)
+
+    def halt_learning(self):
+        self.send(ModelProcess.HALT)
+
+    def reset(self):
+        self.hasAgent = False
+        self.send(ModelProcess.RESET)
+
+    def save(self, filename):
+        self.send(ModelProcess.SAVE, filename)
+
+    def load(self, filename):
+        self.loadFilename = filename
+        self.send(ModelProcess.LOAD, filename)
+
+    def close(self):
+        self.send(ModelProcess.CLOSE)
+        self.isClosed = True
+        self.commands.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def _serve(commands, messages):
+    model = Model()
+    runner = None
+
+    def run(target, finishEvent, args):
+        try:
+            target(messages, *args)
+        except Exception:
+            traceback.print_exc()
+            model.isRunning = False
+            model.publish(messages, Model.Message(Model.Message.EVENT, finishEvent))
+
+    try:
+        while True:
+            command, args = commands.recv()
+            if command == ModelProcess.SET_ENVIRONMENT:
+                model.reset()
+                model.environment_class = loadClass(*args[0])
+            elif command == ModelProcess.SET_AGENT:
+                model.reset()
+                model.agent_class = loadClass(*args[0])
+            elif command in (ModelProcess.TRAIN, ModelProcess.TEST):
+                settings, runArgs = args
+                for name, value in settings.items():
+                    setattr(model, name, value)
+                if command == ModelProcess.TRAIN:
+                    target, finishEvent = model.run_learning, Model.Message.TRAIN_FINISHED
+                else:
+                    target, finishEvent = model.run_testing, Model.Message.TEST_FINISHED
+                runner = threading.Thread(target=run, args=(target, finishEvent, runArgs), daemon=True)
+                runner.start()
+            elif command == ModelProcess.HALT:
+                model.halt_learning()
+            elif command == ModelProcess.RESET:
+                model.reset()
+            elif command == ModelProcess.SAVE:
+                model.save(*args)
+            elif command == ModelProcess.LOAD:
+                model.load(*args)
+            elif command == ModelProcess.REQUEST_FRAMES:
+                model.requestFrames()
+            elif command == ModelProcess.CREATE_BRIDGE:
+                model.createBridge(*args)
+            elif command == ModelProcess.CLOSE:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    model.close()
+    if runner:
+        runner.join(timeout=1)
+    model.reset()
@@ -0,0 +1,48 @@
+from Agents import qLearning, drqn, deepQ, adrqn, doubleDuelingQNative, drqnNative, drqnConvNative, ppoNative, \
+    reinforceNative, actorCriticNative, valueIteration, policyIteration, dynaQ, tileCoding
+from Agents.sarsa import sarsa
+from Environments import cartPoleEnv, cartPoleEnvDiscrete, atariEnv, frozenLakeEnv, pendulumEnv, acrobotEnv, \
+    mountainCarEnv
+
+"""The built-in agents and environments, shared by every view. Their modules only import TensorFlow,
+gym, atari-py, cv2, PIL, cffi and joblib once an instance is created or saved, so importing this
+registry is cheap and class metadata such as displayName and parameters is available straight away.
+"""
+modelBasedAgents = [valueIteration.ValueIteration, policyIteration.PolicyIteration]
+pythonAgents = [deepQ.DeepQ, qLearning.QLearning, drqn.DRQN, adrqn.ADRQN, sarsa, dynaQ.DynaQ, tileCoding.TileCoding] + modelBasedAgents
+nativeAgents = [doubleDuelingQNative.DoubleDuelingQNative, drqnNative.DRQNNative, drqnConvNative.DRQNConvNative,
+                ppoNative.PPONative, reinforceNative.ReinforceNative, actorCriticNative.ActorCriticNative]
+agents = [deepQ.DeepQ, qLearning.QLearning, drqn.DRQN, adrqn.ADRQN] + nativeAgents + [sarsa, dynaQ.DynaQ, tileCoding.TileCoding] + modelBasedAgents
+
+singleDimEnvs = [cartPoleEnv.CartPoleEnv, cartPoleEnvDiscrete.CartPoleEnvDiscrete, frozenLakeEnv.FrozenLakeEnv,
+                 pendulumEnv.PendulumEnv, acrobotEnv.AcrobotEnv, mountainCarEnv.MountainCarEnv]
+atariEnvs = atariEnv.AtariEnv.subEnvs
+environments = singleDimEnvs + atariEnvs
+
+# the environments each agent can be trained on
+allowedEnvs = {
+    deepQ.DeepQ: singleDimEnvs,
+    qLearning.QLearning: [cartPoleEnvDiscrete.CartPoleEnvDiscrete, frozenLakeEnv.FrozenLakeEnv],
+    drqn.DRQN: environments,
+    adrqn.ADRQN: environments,
+    doubleDuelingQNative.DoubleDuelingQNative: singleDimEnvs,
+    drqnNative.DRQNNative: singleDimEnvs,
+    drqnConvNative.DRQNConvNative: atariEnvs,
+    ppoNative.PPONative: singleDimEnvs,
+    reinforceNative.ReinforceNative: singleDimEnvs,
+    actorCriticNative.ActorCriticNative: singleDimEnvs,
+    sarsa: [cartPoleEnvDiscrete.CartPoleEnvDiscrete, frozenLakeEnv.FrozenLakeEnv],
+    dynaQ.DynaQ: [cartPoleEnvDiscrete.CartPoleEnvDiscrete, frozenLakeEnv.FrozenLakeEnv],
+    tileCoding.TileCoding: [cartPoleEnv.CartPoleEnv, acrobotEnv.AcrobotEnv, mountainCarEnv.MountainCarEnv,
+                            pendulumEnv.PendulumEnv],
+    # the environments that expose their transition model
+    valueIteration.ValueIteration: [frozenLakeEnv.FrozenLakeEnv],
+    policyIteration.PolicyIteration: [frozenLakeEnv.FrozenLakeEnv]
+}
+
+
+def find(classes, displayName):
+    for cls in classes:
+        if cls.displayName == displayName:
+            return cls
+    return None
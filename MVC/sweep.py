@@ -0,0 +1,184 @@
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import random
+import statistics
+import sys
+import threading
+
+import numpy as np
+
+from MVC.model import Model
+from MVC import registry, controller
+from MVC.headlessView import View
+
+"""Trains one agent on one environment under many hyperparameter settings and seeds at once, each
+run a headless Model in a pool worker. Every episode summary is appended to a single JSON-lines
+results file tagged with its trial number, and runs that are clearly losing can be stopped early.
+
+usage: python Sweep.py --config sweep.json [--workers N] [--results sweep.jsonl]
+
+The config accepts the headless view's agent, environment, episodes and maxSteps, plus:
+    parameters      per agent parameter, either a list of values or {"min": a, "max": b, "steps": n},
+                    which is spread evenly over [a, b]; a and b default to the parameter's own range.
+                    Unlisted parameters keep their defaults
+    samples         draw this many random settings from the ranges instead of taking the full grid
+    seeds           list of random seeds every setting is run with (default [0])
+    workers         concurrent runs, capped at the number of cores (default: all cores)
+    earlyStop       {"grace": g, "interval": i}: from episode g on, every i episodes, a run whose mean
+                    reward so far is below the median of the other runs at that episode is halted
+"""
+class Sweep:
+    def __init__(self, arguments):
+        self.agentClass = View.find(registry.agents, arguments.get('agent'), 'agent')
+        self.environmentClass = View.find(registry.environments, arguments.get('environment'), 'environment')
+        self.episodes = int(float(arguments.get('episodes', 1000)))
+        self.maxSteps = int(float(arguments.get('maxSteps', 200)))
+        self.results = arguments.get('results', 'sweep.jsonl')
+        cores = os.cpu_count() or 1
+        self.workers = min(int(arguments.get('workers', cores)), cores)
+        self.earlyStop = arguments.get('earlyStop')
+        if isinstance(self.earlyStop, str):
+            self.earlyStop = json.loads(self.earlyStop)
+
+        seeds = arguments.get('seeds', [0])
+        if isinstance(seeds, str):
+            seeds = json.loads(seeds)
+        settings = self.settings(arguments.get('parameters', {}), int(arguments.get('samples', 0)))
+        self.trials = [Sweep.Trial(ind, values, seed)
+                       for ind, (values, seed) in enumerate(itertools.product(settings, seeds))]
+
+    def settings(self, ranges, samples):
+        if isinstance(ranges, str):
+            ranges = json.loads(ranges)
+        unknown = set(ranges) - set(param.name for param in self.agentClass.parameters)
+        if unknown:
+            sys.exit('Unknown parameters for ' + self.agentClass.displayName + ': ' + ', '.join(sorted(unknown)))
+        candidates = []
+        for param in self.agentClass.parameters:
+            spec = ranges.get(param.name, [param.default])
+            if isinstance(spec, dict):
+                low, high = spec.get('min', param.min), spec.get('max', param.max)
+                spec = np.linspace(low, high, int(spec.get('steps', 5))).tolist()
+            candidates.append(sorted(set(Sweep.snap(param, value) for value in spec)))
+
+        if samples:
+            return [[random.choice(values) for values in candidates] for _ in range(samples)]
+        return [list(values) for values in itertools.product(*candidates)]
+
+    @staticmethod
+    def snap(param, value):
+        # keep values on the parameter's declared grid and within its range
+        value = min(max(float(value), param.min), param.max)
+        value = round(value / param.resolution) * param.resolution
+        return View.convert(param, round(value, 10))
+
+    def run(self):
+        context = multiprocessing.get_context()
+        curves = {}
+        checkpoints = {}
+        halted = set()
+        with context.Manager() as manager, context.Pool(self.workers) as pool, open(self.results, 'a') as results:
+            progress = manager.Queue()
+            stopped = manager.dict()
+            pending = [pool.apply_async(runTrial, (trial, self.agentClass, self.environmentClass, self.episodes,
+                                                   self.maxSteps, progress, stopped)) for trial in self.trials]
+            while pending or not progress.empty():
+                try:
+                    trialID, record = progress.get(timeout=0.1)
+                except queue.Empty:
+                    for result in [result for result in pending if result.ready()]:
+                        result.get()
+                        pending.remove(result)
+                    continue
+                trial = self.trials[trialID]
+                results.write(json.dumps(dict(record, trial=trialID, seed=trial.seed,
+                                              parameters=trial.parameters(self.agentClass))) + '\n')
+                rewards = curves.setdefault(trialID, [])
+                rewards.append(record['reward'])
+                if trialID not in halted and len(rewards) < self.episodes and self.shouldStop(rewards, checkpoints):
+                    stopped[trialID] = True
+                    halted.add(trialID)
+                    print('Stopping trial ' + str(trialID) + ' after ' + str(len(rewards)) + ' episodes')
+        return self.report(curves, halted)
+
+    def shouldStop(self, rewards, checkpoints):
+        """The median stopping rule: compare the mean reward so far with the other runs at the same episode"""
+        if not self.earlyStop:
+            return False
+        grace, interval = int(self.earlyStop.get('grace', 100)), int(self.earlyStop.get('interval', 50))
+        episode = len(rewards)
+        if episode < grace or (episode - grace) % interval:
+            return False
+        mean = sum(rewards) / episode
+        others = checkpoints.setdefault(episode, [])
+        stop = len(others) >= 2 and mean < statistics.median(others)
+        others.append(mean)
+        return stop
+
+    def report(self, curves, halted):
+        ranked = sorted(curves.items(), key=lambda item: -Sweep.finalReward(item[1]))
+        print('Trials by mean reward over their last 10% of episodes:')
+        for trialID, rewards in ranked:
+            trial = self.trials[trialID]
+            print('  trial {} (seed {}): {:.3f} over {} episodes{}, {}'.format(
+                trialID, trial.seed, Sweep.finalReward(rewards), len(rewards),
+                ' (stopped early)' if trialID in halted else '', trial.parameters(self.agentClass)))
+        return ranked
+
+    @staticmethod
+    def finalReward(rewards):
+        return float(np.mean(rewards[-max(1, len(rewards) // 10):]))
+
+    class Trial:
+        def __init__(self, id, values, seed):
+            self.id = id
+            self.values = values
+            self.seed = seed
+
+        def parameters(self, agentClass):
+            return {param.name: value for param, value in zip(agentClass.parameters, self.values)}
+
+
+def runTrial(trial, agentClass, environmentClass, episodes, maxSteps, progress, stopped):
+    random.seed(trial.seed)
+    np.random.seed(trial.seed)
+    model = Model()
+    model.agent_class = agentClass
+    model.environment_class = environmentClass
+    model.renderPolicy = Model.RENDER_NEVER
+    model.environment = environmentClass()
+    if hasattr(getattr(model.environment, 'env', None), 'seed'):
+        model.environment.env.seed(trial.seed)
+
+    messageQueue = queue.Queue()
+    runner = threading.Thread(target=model.run_learning, args=[messageQueue, episodes, maxSteps] + trial.values,
+                              daemon=True)
+    runner.start()
+    episode = 0
+    while True:
+        try:
+            message = messageQueue.get(timeout=0.1)
+        except queue.Empty:
+            # run_learning only announces that it finished when it succeeds
+            if runner.is_alive():
+                continue
+            print('Trial ' + str(trial.id) + ' failed after ' + str(episode) + ' episodes')
+            break
+        if message.type == Model.Message.EVENT:
+            break
+        summary = message.data
+        progress.put((trial.id, {'episode': episode, 'steps': summary.steps, 'reward': float(summary.reward),
+                                 'loss': None if summary.loss is None else float(summary.loss),
+                                 'epsilon': summary.epsilon, 'stepsPerSecond': summary.stepsPerSecond}))
+        episode += 1
+        if trial.id in stopped:
+            model.halt_learning()
+    runner.join()
+    model.reset()
+
+
+def main(argv):
+    Sweep(controller.Controller.parseArguments(argv)).run()
@@ -1,14 +1,11 @@
-from Agents import agent, qLearning, qTable, drqn, deepQ, adrqn
-from Environments import cartPoleEnv, cartPoleEnvDiscrete, atariEnv, frozenLakeEnv, pendulumEnv, acrobotEnv, mountainCarEnv
+from Agents import agent
 from MVC.model import Model
-from Agents.sarsa import sarsa
+from MVC import registry
 import time, os
 
 class View:
-    agents = [deepQ.DeepQ, qLearning.QLearning, drqn.DRQN, adrqn.ADRQN, sarsa]
-    environments = [cartPoleEnv.CartPoleEnv, cartPoleEnvDiscrete.CartPoleEnvDiscrete, frozenLakeEnv.FrozenLakeEnv,
-                    pendulumEnv.PendulumEnv, acrobotEnv.AcrobotEnv, mountainCarEnv.MountainCarEnv]
-    environments += atariEnv.AtariEnv.subEnvs
+    agents = registry.pythonAgents
+    environments = registry.environments
 
     def __init__(self, listener):
         self.listener = listener
@@ -16,7 +13,6 @@ class View:
         self.isTrained = False
         self.episodeNum = None
         self.dataPoints = []
-        self.episodeStates = []
         self.paramValues = None
 
         self.environment = self.chooseEnvironment()
@@ -127,7 +123,6 @@ class View:
             self.isTrained = True
             self.episodeNum = 0
             self.dataPoints.clear()
-            self.episodeStates.clear()
             while self.checkMessages():
                 time.sleep(0.1)
         elif choice == 2:
@@ -148,7 +143,6 @@ class View:
             self.listener.startTesting(0, self.paramValues)
             self.episodeNum = 0
             self.dataPoints.clear()
-            self.episodeStates.clear()
             while self.checkMessages():
                 time.sleep(0.1)
         elif choice == 4:
@@ -162,16 +156,14 @@ class View:
     def checkMessages(self):
         while self.listener.getQueue(0).qsize():
             message = self.listener.getQueue(0).get(timeout=0)
-            if message.type == Model.Message.EVENT:
-                if message.data == Model.Message.EPISODE:
-                    self.episodeNum += 1
-                    lastEpsilon = self.episodeStates[-1].epsilon
-                    totalReward = sum([state.reward for state in self.episodeStates])
-                    avgLoss = None if not self.episodeStates[0].loss else sum([state.loss for state in self.episodeStates])/len(self.episodeStates)
-                    print('Episode ' + str(self.episodeNum) + ': episilon = ' + str(lastEpsilon) + ', reward = ' + str(totalReward) + ', loss = ' + str(avgLoss))
-                    self.dataPoints.append((lastEpsilon, totalReward, avgLoss))
-                    self.episodeStates.clear()
-                elif message.data == Model.Message.TRAIN_FINISHED:
+            if message.type == Model.Message.SUMMARY:
+                summary = message.data
+                self.episodeNum += 1
+                print('Episode ' + str(self.episodeNum) + ': episilon = ' + str(summary.epsilon) + ', reward = ' + str(summary.reward) + ', loss = ' + str(summary.loss))
+                print('    ' + summary.timingReport())
+                self.dataPoints.append((summary.epsilon, summary.reward, summary.loss))
+            elif message.type == Model.Message.EVENT:
+                if message.data == Model.Message.TRAIN_FINISHED:
                     totalReward = sum([reward for _, reward, _ in self.dataPoints])
                     avgReward = totalReward/len(self.dataPoints)
                     print('Total Training Reward: ' + str(totalReward))
@@ -183,6 +175,4 @@ class View:
                     print('Total Test Reward: ' + str(totalReward))
                     print('Reward/Episode: ' + str(avgReward))
                     return False
-            elif message.type == Model.Message.STATE:
-                self.episodeStates.append(message.data)
         return True
\ No newline at end of file
@@ -10,12 +10,9 @@ from PIL import ImageTk
 from PIL.ImageTk import PhotoImage
 import ttkwidgets
 
-from Agents import qLearning, qTable, drqn, deepQ, adrqn, agent, doubleDuelingQNative, drqnNative, drqnConvNative, ppoNative, reinforceNative, actorCriticNative
-from Environments import cartPoleEnv, cartPoleEnvDiscrete, atariEnv, frozenLakeEnv, pendulumEnv, acrobotEnv, \
-    mountainCarEnv
-from MVC import helptext
+from Agents import agent
+from MVC import helptext, registry
 from MVC.model import Model
-from Agents.sarsa import sarsa
 import importlib.util
 
 about = """
@@ -33,26 +30,11 @@ about = """
 
 
 class View:
-    agents = [deepQ.DeepQ, qLearning.QLearning, drqn.DRQN, adrqn.ADRQN, doubleDuelingQNative.DoubleDuelingQNative, drqnNative.DRQNNative, drqnConvNative.DRQNConvNative, ppoNative.PPONative, reinforceNative.ReinforceNative, actorCriticNative.ActorCriticNative, sarsa]
-    singleDimEnvs = [cartPoleEnv.CartPoleEnv, cartPoleEnvDiscrete.CartPoleEnvDiscrete, frozenLakeEnv.FrozenLakeEnv,
-                    pendulumEnv.PendulumEnv, acrobotEnv.AcrobotEnv, mountainCarEnv.MountainCarEnv]
-    environments = singleDimEnvs + atariEnv.AtariEnv.subEnvs
-
-    allowedEnvs = {
-        deepQ.DeepQ: singleDimEnvs,
-        qLearning.QLearning: [cartPoleEnvDiscrete.CartPoleEnvDiscrete, frozenLakeEnv.FrozenLakeEnv],
-        drqn.DRQN: environments,
-        adrqn.ADRQN: environments,
-        doubleDuelingQNative.DoubleDuelingQNative: singleDimEnvs,
-        drqnNative.DRQNNative: singleDimEnvs,
-        drqnConvNative.DRQNConvNative: atariEnv.AtariEnv.subEnvs,
-        ppoNative.PPONative: singleDimEnvs,
-        reinforceNative.ReinforceNative: singleDimEnvs,
-        actorCriticNative.ActorCriticNative: singleDimEnvs,
-        sarsa: [cartPoleEnvDiscrete.CartPoleEnvDiscrete, frozenLakeEnv.FrozenLakeEnv]
-    }
-
-    allowedEnvs = {agent.displayName:[env.displayName for env in envs] for (agent, envs) in allowedEnvs.items()}
+    agents = registry.agents
+    singleDimEnvs = registry.singleDimEnvs
+    environments = registry.environments
+
+    allowedEnvs = {agent.displayName:[env.displayName for env in envs] for (agent, envs) in registry.allowedEnvs.items()}
     allowedAgents = {}
     for agent, envs in allowedEnvs.items():
         for env in envs:
@@ -319,6 +301,7 @@ class View:
                 curTab.render.grid_forget()
                 curTab.displayedEpisodeNum.grid_forget()
                 curTab.curEpisodeNum.grid_forget()
+                curTab.timingLabel.grid_forget()
                 curTab.graph.grid_forget()
                 # curTab.graphLine.grid_forget()
                 curTab.xAxisLabel.grid_forget()
@@ -441,10 +424,6 @@ class View:
             self.smoothedDataPoints = []
             self.curLossAccum = 0
             self.curRewardAccum = 0
-            self.curEpisodeSteps = 0
-            self.episodeAccLoss = 0
-            self.episodeAccReward = 0
-            self.episodeAccEpsilon = 0
 
             self.smoothAmt = 20
             self.rewardGraphMin = 0
@@ -565,6 +544,9 @@ class View:
             self.curEpisodeNum = ttk.Label(self, text='Episodes completed:')
             self.curEpisodeNum.grid(row=8, column=1)
 
+            self.timingLabel = ttk.Label(self, text='Steps/sec:', wraplength=275)
+            self.timingLabel.grid(row=9, column=1)
+
             self.graph = tkinter.Canvas(self, bg="gray80", highlightbackground="gray80")
             self.graph.grid(row=0, column=2, rowspan=2, columnspan=1, sticky='wens')
             self.graphLine = self.graph.create_line(0, 0, 0, 0, fill='black')
@@ -673,10 +655,6 @@ class View:
             self.smoothedDataPoints.clear()
             self.curLossAccum = 0
             self.curRewardAccum = 0
-            self.curEpisodeSteps = 0
-            self.episodeAccLoss = 0
-            self.episodeAccReward = 0
-            self.episodeAccEpsilon = 0
             self.graph.delete('all')
             # self.drawAxis()
             self.graphLine = self.graph.create_line(0, 0, 0, 0, fill='black')
@@ -688,21 +666,22 @@ class View:
                 self.notbusy()
             while self.listener.getQueue(self.tabID).qsize():
                 message = self.listener.getQueue(self.tabID).get(timeout=0)
-                if message.type == Model.Message.EVENT:
-                    if message.data == Model.Message.EPISODE:
-                        self.addEpisodeToGraph()
-
-                        self.trainingEpisodes += 1
-                        self.curEpisodeNum.configure(text='Episodes completed: ' + str(self.trainingEpisodes))
-                        if self.isDisplayingEpisode:
-                            self.imageQueues[self.imageQueuesInd].clear()
-                        else:
-                            self.imageQueuesInd = 1 - self.imageQueuesInd
-                            self.imageQueues[self.imageQueuesInd].clear()
-                            self.isDisplayingEpisode = True
-                            self.curImageIndDisplayed = 0
-                            self.displayedEpisodeNum.configure(text='Showing episode ' + str(self.trainingEpisodes))
-                    elif message.data == Model.Message.TRAIN_FINISHED:
+                if message.type == Model.Message.SUMMARY:
+                    summary = message.data
+                    self.addEpisodeToGraph(summary)
+
+                    self.trainingEpisodes += 1
+                    self.curEpisodeNum.configure(text='Episodes completed: ' + str(self.trainingEpisodes))
+                    self.timingLabel.configure(text='Steps/sec: ' + summary.timingReport())
+                    if summary.frames and not self.isDisplayingEpisode:
+                        self.imageQueues[self.imageQueuesInd].clear()
+                        self.imageQueues[self.imageQueuesInd].extend(summary.frames)
+                        self.imageQueuesInd = 1 - self.imageQueuesInd
+                        self.isDisplayingEpisode = True
+                        self.curImageIndDisplayed = 0
+                        self.displayedEpisodeNum.configure(text='Showing episode ' + str(self.trainingEpisodes))
+                elif message.type == Model.Message.EVENT:
+                    if message.data == Model.Message.TRAIN_FINISHED:
                         self.imageQueues[0].clear()
                         self.imageQueues[1].clear()
                         self.imageQueuesInd = 0
@@ -728,9 +707,6 @@ class View:
                         self.legend.itemconfig(self.testResult2, text='Reward/Episode: ' + str(avgReward))
                         self.loadingRenderUpdate()
                         return
-                elif message.type == Model.Message.STATE:
-                    self.imageQueues[self.imageQueuesInd].append(message.data.image)
-                    self.accumulateState(message.data)
 
             self.updateEpisodeRender()
             self.master.after(10, self.checkMessages)
@@ -740,21 +716,12 @@ class View:
                 self.notbusy()
                 self.render.delete('all')
 
-        def addEpisodeToGraph(self):
-            avgLoss = self.episodeAccLoss / self.curEpisodeSteps
-            totalReward = self.episodeAccReward
-            avgEpsilon = self.episodeAccEpsilon / self.curEpisodeSteps
-
-            avgState = (avgLoss, totalReward, avgEpsilon)
+        def addEpisodeToGraph(self, summary):
+            avgState = (summary.loss or 0, summary.reward, summary.epsilon or 0)
             self.graphDataPoints.append(avgState)
 
             self.redrawGraph(len(self.graphDataPoints) % max(5, self.smoothAmt) == 0)
 
-            self.curEpisodeSteps = 0
-            self.episodeAccLoss = 0
-            self.episodeAccReward = 0
-            self.episodeAccEpsilon = 0
-
         def redrawGraphXAxis(self):
             w = self.graph.winfo_width()
             h = self.graph.winfo_height()
@@ -844,15 +811,6 @@ class View:
             self.xAxisLabel.create_text(int(self.xAxisLabel.winfo_width() / 2), int(self.xAxisLabel.winfo_height() / 2),
                                         text='Timestamp', anchor='center')
 
-        def accumulateState(self, state):
-            if state.epsilon:
-                self.episodeAccEpsilon += state.epsilon
-            if state.reward:
-                self.episodeAccReward += state.reward
-            if state.loss:
-                self.episodeAccLoss += state.loss
-            self.curEpisodeSteps += 1
-
         def updateEpisodeRender(self):
             displayQueue = self.imageQueues[1 - self.imageQueuesInd]
             if displayQueue:
@@ -863,6 +821,8 @@ class View:
                     if self.curImageIndDisplayed == len(displayQueue):
                         self.curImageIndDisplayed = 0
                         self.isDisplayingEpisode = False
+                        # the model only renders an episode once the previous one has been shown
+                        self.listener.requestFrames(self.tabID)
                     if tempImage:
                         tempImage = tempImage.resize((self.render.winfo_width(), self.render.winfo_height()))
                         self.image = ImageTk.PhotoImage(
@@ -0,0 +1,4 @@
+from MVC import sweep
+import sys
+
+sweep.main(sys.argv)
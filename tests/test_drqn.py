@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from Agents.drqn import DRQN
+
+
+def makeBuffer(maxlength, historylength, dones):
+    learner = SimpleNamespace(state_size=(1,), batch_size=2, createPriorities=lambda: None)
+    buffer = DRQN.ReplayBuffer(learner, maxlength, historylength)
+    for step, done in enumerate(dones):
+        buffer.appendFrame([step], 0, float(step), [step + 1], done)
+    return buffer
+
+
+def test_history_stops_at_the_end_of_its_episode():
+    buffer = makeBuffer(10, 3, [False, True, False, False, False])
+    assert buffer.historySlots([0, 2, 1]).tolist() == [[-1, 0, 1], [2, 3, 4], [-1, -1, 1]]
+
+
+def test_history_stops_at_the_newest_frame():
+    buffer = makeBuffer(10, 3, [False] * 5)
+    assert buffer.historySlots([3, 4]).tolist() == [[-1, 3, 4], [-1, -1, 4]]
+
+
+def test_history_wraps_around_the_ring():
+    buffer = makeBuffer(4, 3, [False] * 6)
+    # slots 2, 3 and 0 hold steps 2 to 4; slot 1 holds step 5, the newest
+    assert buffer.historySlots([2, 0]).tolist() == [[2, 3, 0], [-1, 0, 1]]
+
+
+def test_gather_pads_the_front_with_empty_frames():
+    buffer = makeBuffer(10, 3, [False, True, False])
+    states, actions, rewards, nextStates, dones = buffer.gather(buffer.historySlots([0, 2]))
+    empty = buffer.emptyState[0]
+    assert states[:, :, 0].tolist() == [[empty, 0, 1], [empty, empty, 2]]
+    assert actions.tolist() == [[-1, 0, 0], [-1, -1, 0]]
+    assert rewards.tolist() == [[0, 0, 1], [0, 0, 2]]
+    assert dones.tolist() == [[False, False, True], [False, False, False]]
+
+
+def test_recent_state_holds_the_current_episode():
+    buffer = makeBuffer(10, 3, [False, True, False, False])
+    assert buffer.recentSlots().tolist() == [-1, 2, 3]
+    recent = buffer.get_recent_state()[:, 0]
+    assert recent.tolist() == [buffer.emptyState[0], 2, 3]
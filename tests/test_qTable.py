@@ -0,0 +1,45 @@
+from Agents.qTable import QTable
+
+
+def test_colliding_states_keep_separate_rows():
+    # hash((-1,)) == hash((-2,)) in CPython
+    table = QTable.HashedTable(2, 100)
+    table.set((-1,), 0, 5.0)
+    assert table.get((-2,), 0) == 0.0
+    table.set((-2,), 1, 3.0)
+    assert table.get((-1,), 0) == 5.0
+    assert table.get((-2,), 1) == 3.0
+    assert table.bestBatch([(-1,), (-2,), (7,)]) == [0, 1, 0]
+
+
+def test_insert_and_lookup():
+    table = QTable.HashedTable(3, 1000)
+    for state in range(500):
+        table.set((state, -state), state % 3, float(state))
+    assert table.count == 500
+    for state in range(500):
+        assert table.get((state, -state), state % 3) == float(state)
+        assert table.best((state, -state)) == (state % 3 if state else 0)
+    assert table.get((1000, 0), 0) == 0.0
+    assert table.row((1000, 0)) is None
+
+
+def test_lru_eviction_drops_the_least_recently_used():
+    table = QTable.HashedTable(2, 16)
+    for state in range(16):
+        table.set((state,), 0, 1.0)
+    # touch every state but the first, so it is the one evicted
+    for state in range(1, 16):
+        table.get((state,), 0)
+    table.set((16,), 0, 1.0)
+    assert table.count == 16
+    assert table.row((0,)) is None
+    assert all(table.get((state,), 0) == 1.0 for state in range(1, 17))
+
+
+def test_resize_keeps_values():
+    table = QTable.HashedTable(2, 8)
+    for state in range(8):
+        table.set((state,), 1, float(state))
+    table.resize(64)
+    assert [table.get((state,), 1) for state in range(8)] == [float(state) for state in range(8)]
@@ -0,0 +1,74 @@
+import numpy as np
+
+from Agents.replayBuffer import ReplayBuffer, SumTree, Priorities
+
+
+def fill(buffer, count, start=0):
+    for step in range(start, start + count):
+        buffer.append([step, -step], step % 3, float(step), [step + 1, -step - 1], step % 5 == 4)
+
+
+def test_ring_buffer_keeps_the_newest_transitions():
+    buffer = ReplayBuffer(8, 4)
+    fill(buffer, 11)
+    assert len(buffer) == 8
+    assert buffer.position == 3
+    assert sorted(buffer.rewards.tolist()) == [float(step) for step in range(3, 11)]
+
+
+def test_gather_keeps_the_fields_of_a_transition_together():
+    buffer = ReplayBuffer(8, 4)
+    fill(buffer, 11)
+    states, actions, rewards, nextStates, dones = buffer.gather(np.array([0, 3, 5, 7]))
+    steps = rewards.astype(int)
+    assert steps.tolist() == [8, 3, 5, 7]
+    assert (states[:, 0] == steps).all()
+    assert (nextStates[:, 0] == steps + 1).all()
+    assert (actions == steps % 3).all()
+    assert (dones == (steps % 5 == 4)).all()
+
+
+def test_append_batch_wraps_around():
+    buffer = ReplayBuffer(4, 2)
+    fill(buffer, 3)
+    states = np.arange(6, dtype=float).reshape(3, 2)
+    buffer.appendBatch(states, [0, 1, 2], [10.0, 11.0, 12.0], states + 1, [False, False, True])
+    assert len(buffer) == 4
+    assert buffer.position == 2
+    assert buffer.rewards.tolist() == [11.0, 12.0, 2.0, 10.0]
+
+
+def test_uniform_samples_are_distinct():
+    buffer = ReplayBuffer(64, 32)
+    fill(buffer, 40)
+    inds = buffer.sampleIndices(32)
+    assert len(set(inds.tolist())) == 32
+    assert (inds < 40).all()
+
+
+def test_sum_tree_totals_and_updates():
+    tree = SumTree(5)
+    tree.update(np.arange(5), np.array([1.0, 2.0, 3.0, 4.0, 0.0]))
+    assert tree.total() == 10.0
+    tree.update([1, 1], [5.0, 6.0])
+    assert tree.get([1]).tolist() == [6.0]
+    assert tree.total() == 14.0
+
+
+def test_sum_tree_finds_the_span_of_each_value():
+    tree = SumTree(4)
+    tree.update(np.arange(4), np.array([1.0, 0.0, 2.0, 3.0]))
+    assert tree.find([0.0, 0.99, 1.0, 2.99, 3.0, 5.99]).tolist() == [0, 0, 2, 2, 3, 3]
+
+
+def test_prioritized_sampling_follows_the_priorities():
+    np.random.seed(0)
+    priorities = Priorities(4, 1.0, 0.4)
+    priorities.add(np.arange(4))
+    priorities.update(np.arange(4), np.array([1.0, 2.0, 3.0, 4.0]))
+    counts = np.zeros(4)
+    for _ in range(500):
+        inds, weights = priorities.sample(20, 4)
+        np.add.at(counts, inds, 1)
+        assert weights.max() == 1.0
+    assert np.allclose(counts / counts.sum(), [0.1, 0.2, 0.3, 0.4], atol=0.02)
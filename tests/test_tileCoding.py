@@ -0,0 +1,56 @@
+import numpy as np
+
+from Agents.tileCoding import TileCoding
+
+
+def makeAgent(tilings=4, tiles=4, tableSize=4096, lam=0.0, gamma=1.0, alpha=1.0):
+    agent = TileCoding((1,), 2, gamma, 0.1, 1.0, 0.018, alpha, tilings, tiles, tableSize, lam)
+    agent.setStateBounds(([0.0], [1.0]))
+    return agent
+
+
+def test_features_pick_one_row_per_tiling():
+    agent = makeAgent(tilings=8)
+    rows = agent.features([[0.1], [0.1], [0.9]])
+    assert rows.shape == (3, 8)
+    assert ((rows >= 0) & (rows < agent.tableSize)).all()
+    assert (rows[0] == rows[1]).all()
+    assert len(set(rows[0].tolist())) == 8
+    # nearby states share most of their tiles, distant ones share none
+    near = agent.features([[0.11]])[0]
+    assert (near == rows[0]).sum() >= 6
+    assert not set(rows[0].tolist()) & set(rows[2].tolist())
+
+
+def test_update_without_traces_changes_only_the_taken_action():
+    agent = makeAgent(tilings=2)
+    features = agent.features([[0.1]])[0]
+    agent.remember([0.1], 1, 1.0, [0.9], done=True)
+    assert np.allclose(agent.weights[features, 1], 0.5)
+    assert np.allclose(agent.weights[features, 0], 0)
+    assert np.count_nonzero(agent.weights) == 2
+
+
+def test_greedy_step_updates_earlier_traces():
+    agent = makeAgent(tilings=1, lam=0.5)
+    first, second = agent.features([[0.1]])[0, 0], agent.features([[0.6]])[0, 0]
+    assert first != second
+    agent.remember([0.1], 0, 1.0, [0.6])
+    assert agent.weights[first, 0] == 1.0
+    # action 0 at the second state is greedy with every weight there zero
+    agent.remember([0.6], 0, 1.0, [0.9])
+    assert agent.weights[second, 0] == 1.0
+    assert agent.weights[first, 0] == 1.5
+
+
+def test_exploratory_step_cuts_the_traces_before_its_update():
+    agent = makeAgent(tilings=1, lam=0.5)
+    first, second = agent.features([[0.1]])[0, 0], agent.features([[0.6]])[0, 0]
+    agent.remember([0.1], 0, 1.0, [0.6])
+    agent.weights[second, 0] = 2.0
+    before = agent.weights.copy()
+    # action 1 is not greedy at the second state, so only its own row learns
+    agent.remember([0.6], 1, 1.0, [0.9])
+    changed = np.argwhere(agent.weights != before).tolist()
+    assert changed == [[second, 1]]
+    assert agent.weights[first, 0] == 1.0